@@ -0,0 +1,327 @@
+"""
+Análisis estructural del nivel: túneles, habitaciones y orden de llenado
+de las metas, con los macro-movimientos que se derivan de ellos.
+
+- túnel: celda de suelo con pared a ambos lados en perpendicular a un eje
+  (pasillo de ancho uno). Si el jugador no puede llegar por otro camino a
+  la celda de delante de una caja empujada dentro, la caja se sigue
+  empujando hasta que sale del túnel o llega a una meta.
+- habitación: región conexa de suelo que no es túnel.
+- habitación de metas: habitación con metas, vista desde cada una de sus
+  entradas (celda de fuera junto a una de la habitación, la puerta). El
+  orden de llenado de cada entrada se calcula hacia atrás: con todas las
+  metas ocupadas, la última en llenarse es la más cercana a la que aún se
+  puede llevar una caja desde la puerta; se quita y se repite.
+
+Macro-movimientos que se derivan de ellos:
+- de túnel: sustituye al empuje que mete una caja en un túnel de un solo
+  sentido (dejarla a medias nunca ayuda).
+- de habitación de metas: cuando una caja cruza una entrada con orden y
+  las cajas de la habitación ocupan justo las primeras metas de ese orden,
+  empujarla de una vez hasta la siguiente meta libre. No siempre es lo
+  correcto (la caja puede hacer falta en otro sitio), así que se ofrece
+  como un sucesor más, junto al empuje normal, y la búsqueda sigue siendo
+  completa.
+
+Se activa asignando el análisis a level.macros (o con
+utils.parse_level(filas, macros=True)); Level.push_successors y
+Level.push_path lo consultan en cada empuje. Solo afecta al modo
+empujes, y un macro-movimiento cuenta como un único empuje, así que las
+soluciones dejan de ser óptimas en empujes a cambio de llegar antes a
+la meta.
+
+    python analysis.py --levels 5,6
+"""
+from collections import deque
+
+from level import iter_cells
+
+# Habitaciones con más metas no se ordenan: el orden cuesta una búsqueda de
+# la caja por cada meta y cada posición del orden
+MAX_ROOM_GOALS = 12
+
+# Regiones del jugador memorizadas en box_path (se vacía al llenarse)
+MAX_FLOODS = 1 << 16
+
+
+class GoalRoom:
+    """
+    Habitación de metas vista desde una de sus entradas.
+    - cells / goals: máscaras de las celdas y de las metas de la habitación
+    - entrance: celda de fuera desde la que se empuja hacia dentro
+    - door: celda de la habitación junto a la entrada
+    - order: metas en orden de llenado, () si no se pudo calcular o None
+      si aún no se ha pedido (se calcula la primera vez, ver goal_macro)
+    - prefixes: prefixes[k] = máscara de las k primeras metas del orden
+    """
+    __slots__ = ("cells", "goals", "entrance", "door", "order", "prefixes")
+
+    def __init__(self, cells, goals, entrance, door):
+        self.cells = cells
+        self.goals = goals
+        self.entrance = entrance
+        self.door = door
+        self.order = None
+        self.prefixes = (0,)
+
+
+class LevelAnalysis:
+    def __init__(self, level):
+        self.level = level
+        size = level.width * level.height
+        neighbors = level.neighbors
+
+        # 1. Túneles por eje (0 vertical: se recorre con U/D, 1 horizontal)
+        self.tunnels = (bytearray(size), bytearray(size))
+        for cell in range(size):
+            if not level.floor[cell]:
+                continue
+            if neighbors[2][cell] < 0 and neighbors[3][cell] < 0:
+                self.tunnels[0][cell] = 1
+            if neighbors[0][cell] < 0 and neighbors[1][cell] < 0:
+                self.tunnels[1][cell] = 1
+
+        # empuje (celda * 4 + d) -> True si entra en un túnel de un solo sentido
+        self.one_way = {}
+        # (celda, cajas) -> región alcanzable por el jugador (ver _flood)
+        self.floods = {}
+
+        # 2. Habitaciones: componentes conexas del suelo que no es túnel
+        self.room_of = [-1] * size
+        self.rooms = []  # id -> máscara de celdas
+        for cell in range(size):
+            if self._in_room(cell) and self.room_of[cell] < 0:
+                self.rooms.append(self._flood_room(cell, len(self.rooms)))
+
+        # 3. Habitaciones de metas, una por entrada (el orden de llenado se
+        #    calcula al consultarlas)
+        self.goal_rooms = []
+        self.entries = {}  # (entrada, puerta) -> GoalRoom
+        for room_id, cells in enumerate(self.rooms):
+            goals = cells & level.goals
+            if not goals:
+                continue
+            for entrance, door in self._doors(room_id, cells):
+                room = GoalRoom(cells, goals, entrance, door)
+                self.goal_rooms.append(room)
+                self.entries[(room.entrance, room.door)] = room
+
+    # ---------------------------
+    # Habitaciones
+    # ---------------------------
+    def _in_room(self, cell):
+        return self.level.floor[cell] and not self.tunnels[0][cell] and not self.tunnels[1][cell]
+
+    def _flood_room(self, start, room_id):
+        """Marca en room_of la habitación de start y devuelve su máscara."""
+        cells = 0
+        self.room_of[start] = room_id
+        stack = [start]
+        while stack:
+            cell = stack.pop()
+            cells |= 1 << cell
+            for table in self.level.neighbors:
+                nxt = table[cell]
+                if nxt >= 0 and self.room_of[nxt] < 0 and self._in_room(nxt):
+                    self.room_of[nxt] = room_id
+                    stack.append(nxt)
+        return cells
+
+    def _doors(self, room_id, cells):
+        """Pares (entrada, puerta) de la habitación: celdas de fuera junto a una de dentro."""
+        neighbors = self.level.neighbors
+        doors = []
+        for cell in iter_cells(cells):
+            for table in neighbors:
+                outside = table[cell]
+                if outside >= 0 and self.room_of[outside] != room_id:
+                    doors.append((outside, cell))
+        return doors
+
+    def _ordered(self, room):
+        """Devuelve room con su orden de llenado, calculándolo la primera vez."""
+        if room.order is None:
+            room.order = ()
+            if bin(room.goals).count("1") <= MAX_ROOM_GOALS:
+                self._packing_order(room)
+        return room
+
+    def _packing_order(self, room):
+        """Calcula room.order hacia atrás (la última meta en llenarse primero)."""
+        remaining = list(iter_cells(room.goals))
+        filled = room.goals
+        order = []
+        while remaining:
+            best = None  # (empujes, meta)
+            for goal in remaining:
+                path = self.box_path(room.door, room.entrance, filled & ~(1 << goal), goal, room.cells)
+                if path is not None and (best is None or len(path) < best[0]):
+                    best = (len(path), goal)
+            if best is None:
+                return  # ninguna meta libre alcanzable: sin orden
+            order.append(best[1])
+            remaining.remove(best[1])
+            filled &= ~(1 << best[1])
+        order.reverse()
+
+        room.order = tuple(order)
+        prefixes = [0]
+        for goal in order:
+            prefixes.append(prefixes[-1] | 1 << goal)
+        room.prefixes = tuple(prefixes)
+
+    # ---------------------------
+    # Caminos de una caja
+    # ---------------------------
+    def _flood(self, pos, box_bits):
+        """Level.reachable memorizado: box_path repite las mismas regiones."""
+        key = (pos, box_bits)
+        region = self.floods.get(key)
+        if region is None:
+            if len(self.floods) >= MAX_FLOODS:
+                self.floods.clear()
+            region = self.level.reachable(pos, box_bits)
+            self.floods[key] = region
+            # los nodos de box_path guardan la celda mínima de la región
+            self.floods[(min(region), box_bits)] = region
+        return region
+
+    def box_path(self, box, player, obstacles, target, area):
+        """
+        Empujes [(celda_caja, d), ...] más cortos para llevar la caja de box
+        a target sin salir de area, con el jugador en player y las cajas de
+        obstacles fijas. None si no hay camino.
+        """
+        level = self.level
+        neighbors, dead = level.neighbors, level.dead
+        flood = self._flood
+        start = (box, min(flood(player, obstacles | 1 << box)))
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            state = queue.popleft()
+            box, pos = state
+            if box == target:
+                pushes = []
+                while came_from[state] is not None:
+                    state, push = came_from[state]
+                    pushes.append(push)
+                pushes.reverse()
+                return pushes
+
+            reach = flood(pos, obstacles | 1 << box)
+            for d in range(4):
+                side = neighbors[d ^ 1][box]
+                nxt = neighbors[d][box]
+                if side < 0 or side not in reach or nxt < 0 or not area >> nxt & 1:
+                    continue
+                if obstacles >> nxt & 1 or dead[nxt]:
+                    continue
+                key = (nxt, min(flood(box, obstacles | 1 << nxt)))
+                if key not in came_from:
+                    came_from[key] = (state, (box, d))
+                    queue.append(key)
+        return None
+
+    # ---------------------------
+    # Macro-movimientos
+    # ---------------------------
+    def __call__(self, cell, d, box_bits):
+        """
+        Empujes [(celda_caja, d), ...] que ejecuta el empuje de la caja de
+        cell en la dirección d: solo ese empuje o, si mete la caja en un
+        túnel de un solo sentido, hasta que sale de él. El empuje inicial
+        debe ser legal; los siguientes también lo son.
+        """
+        level = self.level
+        neighbors = level.neighbors
+        new_box = neighbors[d][cell]
+
+        # Seguir empujando mientras la caja siga en el túnel. Solo si el
+        # jugador no puede llegar por otro lado a la celda de delante ni
+        # siquiera moviendo las demás cajas (se ignoran): si pudiera, dejar
+        # la caja a medio túnel y devolverla luego puede ser necesario. El
+        # túnel no tiene salidas laterales, así que basta con comprobarlo
+        # tras el primer empuje.
+        pushes = [(cell, d)]
+        tunnel = self.tunnels[d >> 1]
+        if not tunnel[new_box]:
+            return pushes
+        one_way = self.one_way.get(cell * 4 + d)
+        if one_way is None:
+            ahead = neighbors[d][new_box]
+            one_way = self.one_way[cell * 4 + d] = \
+                ahead < 0 or ahead not in level.reachable(cell, 1 << new_box)
+        if not one_way:
+            return pushes
+        dead = level.dead
+        while tunnel[new_box] and not level.goals >> new_box & 1:
+            nxt = neighbors[d][new_box]
+            if nxt < 0 or box_bits >> nxt & 1 or dead[nxt]:
+                break
+            pushes.append((new_box, d))
+            new_box = nxt
+        return pushes
+
+    def goal_macro(self, cell, d, box_bits):
+        """
+        Empujes [(cell, d), ...] que meten la caja de cell por una entrada
+        de habitación de metas y la llevan hasta la siguiente meta de su
+        orden, o None si el empuje no entra en una habitación ordenada.
+        Es una alternativa al empuje simple, no lo sustituye.
+        """
+        new_box = self.level.neighbors[d][cell]
+        room = self.entries.get((cell, new_box))
+        if room is None or not self._ordered(room).order:
+            return None
+        others = box_bits & ~(1 << cell)
+        inside = others & room.cells
+        filled = bin(inside).count("1")
+        if filled >= len(room.order) or inside != room.prefixes[filled]:
+            return None
+        path = self.box_path(new_box, cell, others, room.order[filled], room.cells)
+        if path is None:
+            return None
+        return [(cell, d)] + path
+
+    # ---------------------------
+    # Resumen (CLI)
+    # ---------------------------
+    def describe(self):
+        """Resumen en texto: habitaciones, túneles y habitaciones de metas."""
+        level = self.level
+        tunnels = sum(1 for cell in range(len(self.room_of))
+                      if self.tunnels[0][cell] or self.tunnels[1][cell])
+        lines = [f"habitaciones: {len(self.rooms)}  celdas de túnel: {tunnels}"]
+        for room in map(self._ordered, self.goal_rooms):
+            order = " ".join(str(level.coords(goal)) for goal in room.order) or "sin orden"
+            lines.append(f"habitación de metas: entrada {level.coords(room.entrance)} "
+                         f"puerta {level.coords(room.door)} orden: {order}")
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    # utils importa este módulo (parse_level con macros=True): lo que solo
+    # usa la CLI se importa aquí para no cargarlo en cada arranque
+    import argparse
+
+    from batch import parse_selection
+    from utils import load_levels, parse_level
+
+    parser = argparse.ArgumentParser(description="Túneles, habitaciones y orden de llenado de metas")
+    parser.add_argument("--file", default="levels.json", help="archivo de niveles")
+    parser.add_argument("--levels", default="all", help='niveles, p. ej. "0-5,9" (por defecto todos)')
+    args = parser.parse_args(argv)
+
+    levels = load_levels(args.file)
+    try:
+        selection = parse_selection(args.levels, len(levels))
+    except ValueError as error:
+        raise SystemExit(str(error))
+    for index in selection:
+        print(f"level-{index}")
+        print(LevelAnalysis(parse_level(levels[index]).level).describe())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Resolutor por lotes sin interfaz gráfica.
+
+Ejecuta los algoritmos elegidos sobre los niveles elegidos en un pool de
+procesos y escribe un resultado JSON por línea (nivel, algoritmo, solución,
+longitud, nodos, tiempo). Ejemplo:
+
+    python batch.py --levels 0-10,15 --algorithms bfs,a_star --time-limit 60 -j 4
+    python batch.py --file Microban.sok --levels 0-99 -j 4
+
+Con archivos XSB / .sok cada proceso lee sus niveles del archivo por
+posición (levelpack.LevelPack), sin cargar la colección entera.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+from replay import verify_state
+from search import HEURISTICS, INFORMED, SearchStats, solve, solver_names
+from utils import load_levels, parse_level
+
+try:
+    import resource  # solo Unix: límite de memoria por proceso
+except ImportError:
+    resource = None
+
+
+def parse_selection(text, count):
+    """
+    Convierte "0-5,9,12" en una lista de índices de nivel.
+    "all" (o vacío) selecciona todos los niveles.
+    """
+    if not text or text == "all":
+        return list(range(count))
+    indices = []
+    for part in text.split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-", 1)
+            indices.extend(range(int(first), int(last) + 1))
+        elif part:
+            indices.append(int(part))
+    for index in indices:
+        if not 0 <= index < count:
+            raise ValueError(f"Nivel fuera de rango: {index} (hay {count})")
+    return indices
+
+
+def _limit_memory(megabytes):
+    """Fija el límite blando de memoria del proceso actual."""
+    if resource is None or not megabytes:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = megabytes * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+@lru_cache(maxsize=None)
+def _levels(filename):
+    """Colección de niveles del archivo, una por proceso del pool."""
+    return load_levels(filename)
+
+
+def solve_task(task):
+    """
+    Resuelve un (nivel, algoritmo) dentro de un proceso del pool.
+    Devuelve un diccionario listo para serializar como línea JSON.
+    """
+    _limit_memory(task.get("memory_limit"))
+    result = {
+        "level": task["level"],
+        "algorithm": task["algorithm"],
+        "heuristic": task["heuristic"] if task["algorithm"] in INFORMED else None,
+        "mode": task["mode"],
+    }
+
+    stats = SearchStats()
+    start = time.perf_counter()
+    time_limit = task.get("time_limit")
+    deadline = time.monotonic() + time_limit if time_limit else None
+    try:
+        initial_state = parse_level(_levels(task["file"])[task["level"]], macros=task.get("macros", False))
+        solution, _ = solve(
+            task["algorithm"], initial_state,
+            heuristic=task["heuristic"],
+            mode=task["mode"],
+            stats=stats,
+            trace="none",
+            compact=task["compact"],
+            deadline=deadline,
+        )
+        status = stats.status
+        if solution is not None and not verify_state(initial_state, solution)[0]:
+            status = "invalid"  # la solución no pasa la reproducción
+    except MemoryError:
+        solution, status = None, "memory"
+    except Exception as error:  # el lote sigue aunque falle un nivel
+        solution, status = None, f"error: {error}"
+
+    result.update({
+        "status": status,
+        "solution": "".join(solution) if solution else None,
+        "length": len(solution) if solution else None,
+        "nodes": stats.expanded,
+        "generated": stats.generated,
+        "time": round(time.perf_counter() - start, 4),
+    })
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Resolutor Sokoban por lotes (salida JSON lines)")
+    parser.add_argument("--file", default="levels.json", help="archivo de niveles")
+    parser.add_argument("--levels", default="all", help='niveles a resolver, p. ej. "0-5,9" (por defecto todos)')
+    parser.add_argument("--algorithms", default="a_star",
+                        help=f"algoritmos separados por comas: {', '.join(solver_names())}")
+    parser.add_argument("--heuristic", default="manhattan", choices=sorted(HEURISTICS),
+                        help="heurística de los algoritmos informados")
+    parser.add_argument("--mode", default="steps", choices=("steps", "pushes"),
+                        help="modelo de sucesores: pasos del jugador o empujes")
+    parser.add_argument("--compact", action="store_true", help="usar la tabla de predecesores compacta")
+    parser.add_argument("--macros", action="store_true",
+                        help="macro-movimientos por túneles y habitaciones de metas (solo modo empujes)")
+    parser.add_argument("--time-limit", type=float, default=None, help="segundos por nivel")
+    parser.add_argument("--memory-limit", type=int, default=None, help="MB por proceso (solo Unix)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="procesos en paralelo")
+    parser.add_argument("-o", "--output", default=None, help="archivo de salida (por defecto stdout)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    levels = load_levels(args.file)
+    algorithms = [name.strip() for name in args.algorithms.split(",") if name.strip()]
+    for name in algorithms:
+        if name not in solver_names():
+            raise SystemExit(f"Algoritmo desconocido: {name} (disponibles: {', '.join(solver_names())})")
+
+    try:
+        selection = parse_selection(args.levels, len(levels))
+    except ValueError as error:
+        raise SystemExit(str(error))
+
+    tasks = [
+        {
+            "level": index,
+            "file": args.file,
+            "algorithm": name,
+            "heuristic": args.heuristic,
+            "mode": args.mode,
+            "compact": args.compact,
+            "macros": args.macros,
+            "time_limit": args.time_limit,
+            "memory_limit": args.memory_limit,
+        }
+        for index in selection
+        for name in algorithms
+    ]
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [pool.submit(solve_task, task) for task in tasks]
+            for future in as_completed(futures):
+                out.write(json.dumps(future.result()) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+A* con expansión por lotes en NumPy (opcional: sin NumPy no se usa).
+
+En lugar de expandir un estado por vez, saca de la frontera un lote de
+entradas con la misma f (hasta CHUNK) y lo representa como arrays:
+- jugadores: vector (n,) de índices de celda
+- cajas: matriz (n, k) con la celda de cada caja
+Con las tablas del nivel pasadas a arrays (vecinos, casillas muertas y
+distancia Manhattan a la meta más cercana) calcula de una vez, para todo
+el lote y las cuatro direcciones, qué movimientos son legales, qué empujes
+llevan una caja a una casilla muerta y la heurística de cada hijo. En
+Python queda solo el registro de cada hijo en best_g y en la frontera.
+
+Solo modo pasos (el modo empujes necesita el alcance del jugador, que no
+se vectoriza bien) y heurística Manhattan (la misma que search.heuristic).
+Los caminos se guardan en una PredecessorTable como en el modo compacto.
+"""
+import heapq
+
+from level import iter_cells
+from search import (CHECK_EVERY, CLOSED, SOLVERS, PredecessorTable, SearchStats,
+                    _checkpoint, heuristic as manhattan)
+from state import State
+from tracing import DEFAULT_TRACE, make_trace
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Entradas de la frontera expandidas a la vez
+CHUNK = 256
+
+
+class BatchExpander:
+    """Tablas de un Level en arrays de NumPy y expansión de lotes."""
+
+    def __init__(self, level):
+        self.level = level
+        self.neighbors = numpy.array(level.neighbors, dtype=numpy.int64)
+        self.dead = numpy.frombuffer(bytes(level.dead), dtype=numpy.uint8).astype(bool)
+
+        # distancia Manhattan de cada celda a la meta más cercana
+        goals = [level.coords(goal) for goal in level.goal_cells]
+        nearest = numpy.zeros(level.width * level.height, dtype=numpy.int64)
+        if goals:
+            for cell in range(len(nearest)):
+                x, y = level.coords(cell)
+                nearest[cell] = min(abs(x - gx) + abs(y - gy) for gx, gy in goals)
+        self.nearest = nearest
+
+    def heuristic(self, boxes):
+        """Heurística Manhattan de cada fila de la matriz de cajas."""
+        return self.nearest[boxes].sum(axis=1)
+
+    def expand(self, players, boxes):
+        """
+        Sucesores de un paso de todo el lote.
+        Devuelve (fila_padre, d, jugador, cajas, desde, hasta) como arrays;
+        desde/hasta son las celdas de la caja empujada, o -1 si no hay empuje.
+        """
+        parts = []
+        for d in range(4):
+            step = self.neighbors[d][players]
+            legal = step >= 0
+            safe_step = numpy.where(legal, step, 0)
+
+            hit = boxes == step[:, None]
+            pushing = hit.any(axis=1)
+            column = hit.argmax(axis=1)
+
+            # caja delante: detrás debe haber suelo libre y no muerto
+            target = self.neighbors[d][safe_step]
+            safe_target = numpy.where(target >= 0, target, 0)
+            blocked = (target < 0) | (boxes == safe_target[:, None]).any(axis=1) | self.dead[safe_target]
+            legal &= ~(pushing & blocked)
+
+            rows = numpy.nonzero(legal)[0]
+            child_boxes = boxes[rows].copy()
+            push = pushing[rows]
+            push_rows = numpy.nonzero(push)[0]
+            child_boxes[push_rows, column[rows][push_rows]] = target[rows][push_rows]
+            origin = numpy.where(push, step[rows], -1)
+            moved_to = numpy.where(push, target[rows], -1)
+            parts.append((rows, numpy.full(len(rows), d), step[rows], child_boxes, origin, moved_to))
+
+        return tuple(numpy.concatenate(column) for column in zip(*parts))
+
+
+def a_star_batched(initial_state, heuristic="manhattan", mode="steps", stats=None, trace=DEFAULT_TRACE,
+                   compact=False, deadline=None, cancel=None, progress=None, chunk=CHUNK):
+    """
+    A* (ver search.a_star) que expande lotes de hasta `chunk` estados con la
+    misma f usando BatchExpander. Devuelve (camino, explorados) y admite la
+    misma traza y el mismo control; compact no cambia nada (siempre usa la
+    tabla de predecesores).
+    """
+    if numpy is None:
+        raise RuntimeError("a_star_batched necesita NumPy")
+    if mode != "steps":
+        raise ValueError("a_star_batched solo admite mode='steps'")
+    if heuristic not in ("manhattan", manhattan):
+        raise ValueError("a_star_batched solo admite la heurística Manhattan")
+    if stats is None:
+        stats = SearchStats()
+    trace = make_trace(trace)
+    control = (deadline, cancel, progress)
+    watch = control != (None, None, None)
+    record = trace.record if trace.active else None
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    level = initial_state.level
+    deadlock = level.deadlock
+    expander = BatchExpander(level)
+    table = PredecessorTable(level, "steps")
+    root_cells = tuple(iter_cells(initial_state.box_bits))
+    box_count = len(root_cells)
+    cells = [root_cells]  # id -> celdas de las cajas (tupla compartida si no hay empuje)
+
+    root_key = table.key(initial_state.pos, initial_state.box_bits)
+    best_g = {root_key: 0}
+    h0 = manhattan(initial_state)
+    frontier = [(h0, h0, table.add(root_key, -1, 0))]
+    stats.pushes += 1
+
+    while frontier:
+        # 1. Lote de entradas vigentes con la misma f
+        f = frontier[0][0]
+        batch = []
+        while frontier and frontier[0][0] == f and len(batch) < chunk:
+            _, h, state_id = heappop(frontier)
+            stats.pops += 1
+            if watch and stats.pops % CHECK_EVERY == 0 and \
+                    _checkpoint(stats, *control, len(frontier), f):
+                return None, trace.records()
+            g = f - h
+            key = table.keys[state_id]
+            if best_g[key] != g:
+                stats.stale_pops += 1
+                continue
+
+            best_g[key] = CLOSED
+            pos, box_bits = table.unpack(state_id)
+            if record:
+                record(State(level, pos, box_bits, cost=g))
+            if box_bits == level.goals:
+                stats.status = "solved"
+                return table.path(state_id), trace.records()
+            batch.append((state_id, g, pos, box_bits))
+        if not batch:
+            continue
+
+        # 2. Expansión y heurística de todo el lote
+        stats.expanded += len(batch)
+        players = numpy.array([pos for _, _, pos, _ in batch], dtype=numpy.int64)
+        boxes = numpy.array([cells[state_id] for state_id, _, _, _ in batch],
+                            dtype=numpy.int64).reshape(len(batch), box_count)
+        rows, dirs, new_players, new_boxes, origins, targets = expander.expand(players, boxes)
+        hs = expander.heuristic(new_boxes)
+
+        # 3. Registro de los hijos (Python)
+        for row, d, new_pos, child, origin, target, h in zip(
+                rows.tolist(), dirs.tolist(), new_players.tolist(), new_boxes.tolist(),
+                origins.tolist(), targets.tolist(), hs.tolist()):
+            stats.generated += 1
+            parent_id, g, _, new_bits = batch[row]
+            if origin >= 0:
+                new_bits ^= (1 << origin) | (1 << target)
+                if deadlock is not None and deadlock(new_bits, target):
+                    continue
+            g += 1
+            key = table.key(new_pos, new_bits)
+            known = best_g.get(key)
+            if known is not None and known <= g:
+                continue
+            best_g[key] = g
+            heappush(frontier, (g + h, h, table.add(key, parent_id, d)))
+            cells.append(tuple(child) if origin >= 0 else cells[parent_id])
+            stats.pushes += 1
+
+    stats.status = "exhausted"
+    return None, trace.records()
+
+
+# Disponible por nombre en search.solve (batch, benchmarks) solo con NumPy;
+# search importa este módulo la primera vez que se pide (LAZY_SOLVERS)
+if numpy is not None:
+    SOLVERS["a_star_batched"] = a_star_batched
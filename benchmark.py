@@ -0,0 +1,425 @@
+"""
+Benchmarks reproducibles de los algoritmos de búsqueda.
+
+Ejecuta cada configuración (algoritmo, heurística, modelo de sucesores) sobre
+los niveles de levels.json y sobre niveles grandes generados, y mide tiempo,
+nodos expandidos y generados, pico de memoria (tracemalloc) y longitud de la
+solución. Los resultados se pueden guardar como línea base y comparar con una
+línea base anterior: el proceso termina con código 1 si hay regresiones.
+
+    python benchmark.py --levels 0-20 --generated 3 --save baseline.json
+    python benchmark.py --levels 0-20 --generated 3 --compare baseline.json
+    python benchmark.py --imports
+
+Con --imports mide en su lugar el arranque en frío: el tiempo de importar
+cada módulo en un intérprete nuevo y qué dependencias pesadas arrastra.
+
+Cada caso se cronometra --repeat veces (3 por defecto) sin tracemalloc y
+se toma el menor tiempo; la memoria se mide en una pasada aparte con
+tracemalloc (se omite con --no-memory). Un tiempo solo es regresión si
+supera el umbral relativo, MIN_TIME_DELTA y la dispersión entre
+repeticiones (spread) de la base y de la ejecución actual.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from batch import parse_selection
+from replay import verify_state
+from search import INFORMED, SearchStats, solve, solver_names
+from utils import load_levels, parse_level
+
+# Configuraciones por defecto: "algoritmo:heurística:modo"
+DEFAULT_CONFIGS = (
+    "bfs::pushes",
+    "a_star:manhattan:steps",
+    "a_star:matching:pushes",
+)
+
+# Tamaños de los niveles generados: (ancho, alto, cajas)
+GENERATED_SIZES = ((10, 8, 3), (12, 10, 4), (14, 12, 5), (16, 14, 6), (20, 16, 7))
+
+# Módulos cuyo arranque en frío mide --imports
+IMPORT_MODULES = ("search", "utils", "batch", "benchmark", "main")
+
+# Dependencias pesadas que no deberían cargarse al importar el núcleo
+HEAVY_MODULES = ("numpy", "PIL", "matplotlib", "sqlite3", "cProfile", "re")
+
+# Diferencia mínima de tiempo (s) para considerar una regresión (ruido)
+MIN_TIME_DELTA = 0.05
+
+# tracemalloc ralentiza la búsqueda: la pasada de memoria tiene este
+# múltiplo del límite de tiempo
+MEMORY_TIME_FACTOR = 10
+
+
+# ============================================================
+# Niveles generados
+# ============================================================
+def generate_level(width, height, boxes, seed, wall_ratio=0.12, pulls=None):
+    """
+    Genera un nivel resoluble de forma determinista (misma semilla, mismo nivel).
+    Parte de todas las cajas sobre sus metas y aplica tirones aleatorios, que
+    son movimientos inversos válidos: deshacerlos resuelve el nivel.
+    """
+    rng = random.Random(seed)
+    grid = [["#"] * width for _ in range(height)]
+    for y in range(1, height - 1):
+        for x in range(1, width - 1):
+            if rng.random() >= wall_ratio:
+                grid[y][x] = " "
+
+    # quedarse con la mayor región conexa de suelo
+    floor = {(x, y) for y in range(height) for x in range(width) if grid[y][x] == " "}
+    regions = []
+    while floor:
+        stack = [floor.pop()]
+        region = set(stack)
+        while stack:
+            x, y = stack.pop()
+            for nxt in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)):
+                if nxt in floor:
+                    floor.remove(nxt)
+                    region.add(nxt)
+                    stack.append(nxt)
+        regions.append(region)
+    region = max(regions, key=len)
+    for y in range(height):
+        for x in range(width):
+            if (x, y) not in region:
+                grid[y][x] = "#"
+
+    cells = sorted(region)
+    goals = rng.sample(cells, boxes)
+    player = rng.choice([cell for cell in cells if cell not in goals])
+    box_set = set(goals)
+
+    # tirones aleatorios desde la posición resuelta
+    for _ in range(pulls if pulls is not None else boxes * 40):
+        reach = _reachable(region, box_set, player)
+        moves = []
+        for (bx, by) in box_set:
+            for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+                stand = (bx + dx, by + dy)
+                back = (bx + 2 * dx, by + 2 * dy)
+                if stand in reach and back in region and back not in box_set:
+                    moves.append(((bx, by), stand, back))
+        if not moves:
+            break
+        box, stand, back = rng.choice(moves)
+        box_set.remove(box)
+        box_set.add(stand)
+        player = back
+
+    rows = []
+    for y in range(height):
+        row = []
+        for x in range(width):
+            cell = grid[y][x]
+            if (x, y) in box_set:
+                cell = "*" if (x, y) in goals else "$"
+            elif (x, y) == player:
+                cell = "+" if (x, y) in goals else "@"
+            elif (x, y) in goals:
+                cell = "."
+            row.append(cell)
+        rows.append("".join(row))
+    return rows
+
+
+def _reachable(region, box_set, start):
+    seen = {start}
+    stack = [start]
+    while stack:
+        x, y = stack.pop()
+        for nxt in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)):
+            if nxt in region and nxt not in box_set and nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return seen
+
+
+# ============================================================
+# Ejecución y medición
+# ============================================================
+def parse_config(text):
+    """"algoritmo:heurística:modo" -> dict (heurística y modo opcionales)."""
+    parts = (text.split(":") + ["", ""])[:3]
+    algorithm, heuristic, mode = (part.strip() for part in parts)
+    if algorithm not in solver_names():
+        raise ValueError(f"Algoritmo desconocido: {algorithm}")
+    if algorithm not in INFORMED:
+        heuristic = "-"
+    return {"algorithm": algorithm, "heuristic": heuristic or "manhattan", "mode": mode or "steps"}
+
+
+def run_case(rows, config, time_limit=None, measure_memory=False, macros=False):
+    """
+    Resuelve un nivel con una configuración y devuelve sus métricas. time
+    incluye la preparación del nivel (parse_level, con el análisis de
+    macro-movimientos si se piden), que también se da aparte en setup.
+    Con measure_memory la búsqueda corre con tracemalloc, que la ralentiza:
+    su tiempo no es comparable con el de una pasada sin él.
+    """
+    stats = SearchStats()
+    deadline = time.monotonic() + time_limit if time_limit else None
+
+    start = time.perf_counter()
+    initial_state = parse_level(rows, macros=macros)
+    setup = time.perf_counter() - start
+    if measure_memory:
+        tracemalloc.start()
+    solution, _ = solve(
+        config["algorithm"], initial_state,
+        heuristic=config["heuristic"],
+        mode=config["mode"],
+        stats=stats,
+        trace="none",
+        deadline=deadline,
+    )
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if measure_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    # una solución que no pasa la reproducción cuenta como no resuelta
+    status = stats.status
+    if solution is not None and not verify_state(initial_state, solution)[0]:
+        status = "invalid"
+
+    return {
+        "status": status,
+        "time": round(elapsed, 4),
+        "setup": round(setup, 4),
+        "expanded": stats.expanded,
+        "generated": stats.generated,
+        "peak_kb": round(peak / 1024, 1),
+        "length": len(solution) if solution else None,
+    }
+
+
+def config_name(config):
+    return f"{config['algorithm']}:{config['heuristic']}:{config['mode']}"
+
+
+def run_suite(cases, configs, time_limit=None, measure_memory=True, repeat=3, log=None, macros=False):
+    """
+    Ejecuta todas las combinaciones (caso, configuración).
+    cases: lista de (nombre, filas). Devuelve {"caso|config": métricas}.
+    El tiempo es el menor de repeat pasadas sin tracemalloc y spread la
+    diferencia entre la más lenta y la más rápida (ruido de la medida). Las
+    pasadas son rondas completas sobre todos los casos y no repeticiones
+    seguidas: la velocidad de la máquina varía por rachas de segundos, y
+    así el mínimo de cada caso sale de momentos distintos. Con
+    measure_memory el pico de memoria de los casos resueltos sale de una
+    pasada más, con tracemalloc y MEMORY_TIME_FACTOR veces el límite de
+    tiempo; si no, peak_kb queda en 0.
+    """
+    rounds = max(repeat, 1)
+    results = {}
+    times = {}
+    for round_index in range(rounds):
+        for name, rows in cases:
+            for config in configs:
+                key = f"{name}|{config_name(config)}" + ("|macros" if macros else "")
+                metrics = run_case(rows, config, time_limit, False, macros)
+                results.setdefault(key, metrics)
+                times.setdefault(key, []).append(metrics["time"])
+                if round_index < rounds - 1:
+                    continue
+
+                metrics = results[key]
+                metrics["time"] = min(times[key])
+                metrics["spread"] = round(max(times[key]) - min(times[key]), 4)
+                if measure_memory and metrics["status"] == "solved":
+                    # si aun así se corta por tiempo, el pico no es comparable
+                    # y queda en 0 (no se compara)
+                    limit = time_limit * MEMORY_TIME_FACTOR if time_limit else None
+                    memory = run_case(rows, config, limit, True, macros)
+                    metrics["peak_kb"] = memory["peak_kb"] if memory["status"] == "solved" else 0
+                if log:
+                    log(key, metrics)
+    return results
+
+
+def slower(current, base, threshold=0.25):
+    """
+    True si el tiempo de current es una regresión respecto a base: supera
+    el umbral relativo y crece más que MIN_TIME_DELTA y que el spread de
+    las repeticiones de ambas.
+    """
+    delta = current["time"] - base["time"]
+    noise = max(MIN_TIME_DELTA, base.get("spread", 0), current.get("spread", 0))
+    return current["time"] > base["time"] * (1 + threshold) and delta > noise
+
+
+def recheck(results, baseline, cases, configs, time_limit=None, repeat=3, macros=False, threshold=0.25):
+    """
+    Vuelve a cronometrar (repeat rondas, sin memoria) los casos resueltos
+    que compare marcaría como más lentos y funde las medidas en results:
+    menor tiempo y spread sobre todas las pasadas. Una racha lenta de la
+    máquina dura más que una ronda, pero rara vez dos seguidas; una
+    regresión real se mantiene. Devuelve las claves que se repitieron.
+    """
+    flagged = [key for key, base in baseline.items()
+               if key in results and base["status"] == "solved" == results[key]["status"]
+               and slower(results[key], base, threshold)]
+    rows_of = dict(cases)
+    config_of = {config_name(config): config for config in configs}
+    for key in flagged:
+        name, config_text = key.split("|")[:2]
+        again = run_suite([(name, rows_of[name])], [config_of[config_text]],
+                          time_limit, False, repeat, macros=macros)
+        current, new = results[key], again[key]
+        slowest = max(current["time"] + current["spread"], new["time"] + new["spread"])
+        current["time"] = min(current["time"], new["time"])
+        current["spread"] = round(slowest - current["time"], 4)
+    return flagged
+
+
+def compare(results, baseline, threshold=0.25, memory_threshold=0.25):
+    """
+    Compara con la línea base y devuelve la lista de regresiones (texto).
+    - un caso resuelto en la base que ahora no se resuelve
+    - tiempo, nodos expandidos o memoria por encima del umbral relativo (el
+      tiempo además debe crecer más que el ruido, ver slower)
+    - una solución más larga que la de la base
+    """
+    regressions = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None:
+            continue
+        if base["status"] == "solved" and current["status"] != "solved":
+            regressions.append(f"{key}: {base['status']} -> {current['status']}")
+            continue
+        if base["status"] != "solved" or current["status"] != "solved":
+            continue
+        if slower(current, base, threshold):
+            regressions.append(f"{key}: tiempo {base['time']}s -> {current['time']}s")
+        if current["expanded"] > base["expanded"] * (1 + threshold):
+            regressions.append(f"{key}: expandidos {base['expanded']} -> {current['expanded']}")
+        # con --no-memory el pico queda en 0 y no se compara
+        if base["peak_kb"] and current["peak_kb"] and current["peak_kb"] > base["peak_kb"] * (1 + memory_threshold):
+            regressions.append(f"{key}: memoria {base['peak_kb']}KB -> {current['peak_kb']}KB")
+        if base["length"] is not None and current["length"] > base["length"]:
+            regressions.append(f"{key}: longitud {base['length']} -> {current['length']}")
+    return regressions
+
+
+# ============================================================
+# Arranque en frío (tiempos de importación)
+# ============================================================
+_IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def import_time(module, repeat=5):
+    """
+    Importa module en `repeat` intérpretes nuevos y devuelve
+    (menor tiempo en s, dependencias pesadas cargadas), o (None, error).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    probe = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    best, heavy = None, ""
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", probe], cwd=here,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            return None, lines[-1] if lines else "error"
+        elapsed, _, heavy = result.stdout.strip().partition(" ")
+        best = min(best, float(elapsed)) if best is not None else float(elapsed)
+    return best, heavy
+
+
+def import_report(modules=IMPORT_MODULES, repeat=5):
+    """Imprime el tiempo de importación en frío de cada módulo."""
+    for module in modules:
+        elapsed, heavy = import_time(module, repeat)
+        if elapsed is None:
+            print(f"{module:12s} error: {heavy}")
+        else:
+            print(f"{module:12s} {elapsed * 1000:8.1f} ms  pesados: {heavy or '-'}")
+
+
+def build_cases(levels_file, selection, generated, seed):
+    levels = load_levels(levels_file)
+    cases = [(f"level-{index}", levels[index]) for index in parse_selection(selection, len(levels))]
+    for i, (width, height, boxes) in enumerate(GENERATED_SIZES[:generated]):
+        rows = generate_level(width, height, boxes, seed + i)
+        cases.append((f"gen-{width}x{height}-{boxes}-s{seed + i}", rows))
+    return cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de los algoritmos de búsqueda")
+    parser.add_argument("--file", default="levels.json", help="archivo de niveles")
+    parser.add_argument("--levels", default="all", help='niveles de --file, p. ej. "0-20" (por defecto todos)')
+    parser.add_argument("--generated", type=int, default=len(GENERATED_SIZES),
+                        help=f"niveles generados a incluir (0-{len(GENERATED_SIZES)})")
+    parser.add_argument("--seed", type=int, default=1, help="semilla de los niveles generados")
+    parser.add_argument("--configs", default=",".join(DEFAULT_CONFIGS),
+                        help='configuraciones "algoritmo:heurística:modo" separadas por comas')
+    parser.add_argument("--time-limit", type=float, default=10.0, help="segundos por caso")
+    parser.add_argument("--no-memory", action="store_true", help="sin la pasada de memoria (tracemalloc)")
+    parser.add_argument("--macros", action="store_true",
+                        help="macro-movimientos por túneles y habitaciones de metas (solo modo empujes)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="pasadas cronometradas por caso (se toma el menor tiempo)")
+    parser.add_argument("--save", help="guardar los resultados como línea base")
+    parser.add_argument("--compare", help="línea base con la que comparar")
+    parser.add_argument("--threshold", type=float, default=0.25, help="regresión relativa tolerada")
+    parser.add_argument("--imports", action="store_true",
+                        help="medir solo el arranque en frío de los módulos (usa --repeat)")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        import_report(repeat=max(args.repeat, 5))
+        return
+
+    try:
+        configs = [parse_config(text) for text in args.configs.split(",") if text.strip()]
+        cases = build_cases(args.file, args.levels, args.generated, args.seed)
+    except ValueError as error:
+        raise SystemExit(str(error))
+
+    def log(key, metrics):
+        print(f"{key:45s} {metrics['status']:9s} {metrics['time']:9.3f}s ±{metrics['spread']:.3f} "
+              f"(prep {metrics['setup']:.3f}s) exp={metrics['expanded']:<8d} gen={metrics['generated']:<9d} "
+              f"mem={metrics['peak_kb']:>9.1f}KB len={metrics['length']}", flush=True)
+
+    results = run_suite(cases, configs, args.time_limit, not args.no_memory, args.repeat, log, args.macros)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"Línea base guardada en {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for key in recheck(results, baseline, cases, configs, args.time_limit,
+                           args.repeat, args.macros, args.threshold):
+            print(f"{key:45s} repetido: {results[key]['time']:.3f}s ±{results[key]['spread']:.3f}")
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESIÓN", line)
+        if regressions:
+            sys.exit(1)
+        print("Sin regresiones respecto a", args.compare)
+
+
+if __name__ == "__main__":
+    main()
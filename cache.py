@@ -0,0 +1,271 @@
+"""
+Caché persistente de soluciones y cotas (sqlite, un solo archivo).
+
+Guarda, entre ejecuciones:
+- soluciones: por nivel canónico + algoritmo, heurística y modo
+- callejones sin salida: posiciones cuya búsqueda se agotó sin solución
+  (solo búsquedas sin macro-movimientos, que son completas)
+- cotas inferiores: el mejor f probado por búsquedas cortadas por tiempo
+  (tampoco con macro-movimientos, ver search.proves_bound)
+- patrones de bloqueo (ver deadlock.py): por tablero, sin cajas ni
+  jugador, así que valen para cualquier posición del mismo tablero
+
+Callejones y cotas son de la posición inicial de cada búsqueda: las
+posiciones intermedias no se guardan (serían millones de filas). Lo que
+se reaprovecha en búsquedas parecidas (otra posición inicial, otro
+algoritmo o modo sobre el mismo tablero) son los patrones de bloqueo, que
+se cargan en el detector antes de buscar.
+
+La clave de un nivel es un hash de su interior (celdas de suelo), metas,
+cajas y jugador: dos mapas con distinta decoración exterior comparten
+clave. Para callejones y cotas en modo empujes el jugador se normaliza a
+la menor celda de su región, porque solo importa la región.
+
+Las soluciones guardadas se verifican con replay.verify antes de
+devolverlas: una entrada que no resuelve el nivel se ignora y se vuelve a
+buscar.
+
+Cuando el archivo supera max_bytes se borran las entradas usadas hace más
+tiempo (auto_vacuum devuelve el espacio al sistema de archivos).
+"""
+import hashlib
+import os
+import sqlite3
+import time
+
+from replay import verify_state
+from search import INFORMED, SearchStats, proves_bound, solve
+
+# En el directorio de caché del usuario, no en el de trabajo
+DEFAULT_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                            "sokoban-ia", "solutions.db")
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Patrones de bloqueo guardados por tablero (se quedan los de menos cajas)
+MAX_PATTERNS = 10000
+
+# Cota guardada para una posición sin solución
+DEAD = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    key TEXT PRIMARY KEY,
+    solution TEXT NOT NULL,
+    expanded INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bounds (
+    key TEXT PRIMARY KEY,
+    bound INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS patterns (
+    key TEXT PRIMARY KEY,
+    patterns TEXT NOT NULL,
+    used REAL NOT NULL
+);
+"""
+
+
+def level_key(state, canonical_player=False):
+    """Hash canónico de (interior, metas, cajas, jugador) de un estado."""
+    level = state.level
+    pos = state.pos
+    if canonical_player:
+        pos = min(level.reachable(pos, state.box_bits))
+    digest = hashlib.sha1()
+    digest.update(f"{level.width}:{level.goals:x}:{state.box_bits:x}:{pos}:".encode())
+    digest.update(bytes(level.floor))
+    return digest.hexdigest()
+
+
+def board_key(level):
+    """Hash canónico del tablero (interior y metas), sin cajas ni jugador."""
+    digest = hashlib.sha1()
+    digest.update(f"{level.width}:{level.goals:x}:".encode())
+    digest.update(bytes(level.floor))
+    return digest.hexdigest()
+
+
+class SolutionCache:
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # la GUI la usa desde el hilo de búsqueda (uno a la vez)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        # debe fijarse antes de crear las tablas para tener efecto
+        self.db.execute("PRAGMA auto_vacuum = FULL")
+        self.db.executescript(_SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    # ---------------------------
+    # Soluciones
+    # ---------------------------
+    @staticmethod
+    def solution_key(state, algorithm, heuristic, mode):
+        if algorithm not in INFORMED:
+            heuristic = "-"
+        return f"{level_key(state)}|{algorithm}|{heuristic}|{_variant(state, mode)}"
+
+    def get_solution(self, key):
+        """Devuelve (solución, expandidos) o None."""
+        row = self.db.execute("SELECT solution, expanded FROM solutions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._touch("solutions", key)
+        return list(row[0]), row[1]
+
+    def put_solution(self, key, solution, expanded):
+        self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)",
+                        (key, "".join(solution), expanded, time.time()))
+        self._commit()
+
+    # ---------------------------
+    # Callejones y cotas inferiores
+    # ---------------------------
+    @staticmethod
+    def bound_key(state, mode, variant=None):
+        # en modo pasos el costo depende de la casilla exacta del jugador
+        variant = variant or _variant(state, mode)
+        return f"{level_key(state, canonical_player=mode == 'pushes')}|{variant}"
+
+    def get_bound(self, state, mode, variant=None):
+        """
+        Cota inferior guardada del costo óptimo (DEAD si no hay solución), o
+        None. variant fuerza la variante de la clave (ver _variant).
+        """
+        key = self.bound_key(state, mode, variant)
+        row = self.db.execute("SELECT bound FROM bounds WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._touch("bounds", key)
+        return row[0]
+
+    def put_bound(self, state, mode, bound):
+        """Guarda una cota si mejora la conocida (DEAD no se sobrescribe)."""
+        known = self.get_bound(state, mode)
+        if known == DEAD or (known is not None and bound != DEAD and known >= bound):
+            return
+        self.db.execute("INSERT OR REPLACE INTO bounds VALUES (?, ?, ?)",
+                        (self.bound_key(state, mode), bound, time.time()))
+        self._commit()
+
+    def is_dead(self, state, mode):
+        # sin solución lo es en cualquier modo. Solo cuentan las búsquedas
+        # sin macro-movimientos: con ellos no se prueba que no haya solución
+        return DEAD in (self.get_bound(state, "pushes", variant="pushes"),
+                        self.get_bound(state, mode, variant=mode))
+
+    # ---------------------------
+    # Patrones de bloqueo
+    # ---------------------------
+    def get_patterns(self, level):
+        """Patrones de bloqueo guardados para el tablero de level (máscaras)."""
+        key = board_key(level)
+        row = self.db.execute("SELECT patterns FROM patterns WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return []
+        self._touch("patterns", key)
+        return [int(pattern, 16) for pattern in row[0].split()]
+
+    def put_patterns(self, level, patterns):
+        """Une patterns a los patrones guardados del tablero."""
+        known = set(self.get_patterns(level))
+        merged = known | set(patterns)
+        if merged == known:
+            return
+        # los de menos cajas son los más generales
+        merged = sorted(merged, key=lambda pattern: (bin(pattern).count("1"), pattern))[:MAX_PATTERNS]
+        self.db.execute("INSERT OR REPLACE INTO patterns VALUES (?, ?, ?)",
+                        (board_key(level), " ".join(f"{pattern:x}" for pattern in merged), time.time()))
+        self._commit()
+
+    # ---------------------------
+    # Mantenimiento
+    # ---------------------------
+    def _touch(self, table, key):
+        self.db.execute(f"UPDATE {table} SET used = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+
+    def size(self):
+        page_count = self.db.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self.db.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def _commit(self):
+        self.db.commit()
+        if self.max_bytes and self.size() > self.max_bytes:
+            self.evict()
+
+    def evict(self, fraction=0.25):
+        """Borra la fracción de entradas usadas hace más tiempo de cada tabla."""
+        for table in ("solutions", "bounds", "patterns"):
+            count = self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            drop = max(1, int(count * fraction)) if count else 0
+            self.db.execute(f"DELETE FROM {table} WHERE key IN "
+                            f"(SELECT key FROM {table} ORDER BY used LIMIT ?)", (drop,))
+        self.db.commit()
+
+
+def _variant(state, mode):
+    """
+    Modo para las claves: con macro-movimientos (analysis.py) el modo
+    empujes explora otro espacio, así que sus soluciones se guardan aparte.
+    Sus callejones y cotas no se guardan (ver store_result).
+    """
+    if mode == "pushes" and state.level.macros is not None:
+        return "pushes+macros"
+    return mode
+
+
+def solve_cached(cache, algorithm, initial_state, heuristic="manhattan", **options):
+    """
+    Como search.solve, pero consulta la caché antes de buscar y guarda el
+    resultado después. Devuelve (camino, explorados, en_caché); un acierto
+    no tiene exploración. stats.status queda "solved" o "exhausted" también
+    en los aciertos.
+    """
+    mode = options.get("mode", "steps")
+    stats = options.setdefault("stats", SearchStats())
+    key = cache.solution_key(initial_state, algorithm, heuristic, mode)
+
+    hit = cache.get_solution(key)
+    if hit is not None and verify_state(initial_state, hit[0])[0]:
+        solution, stats.expanded = hit
+        stats.status = "solved"
+        return solution, [], True
+    if cache.is_dead(initial_state, mode):
+        stats.status = "exhausted"
+        return None, [], True
+    # una cota previa sigue valiendo si esta búsqueda se corta antes (con
+    # macro-movimientos no hay cotas, ver search.proves_bound)
+    if proves_bound(initial_state, mode):
+        stats.bound = max(stats.bound, cache.get_bound(initial_state, mode) or 0)
+    # bloqueos ya encontrados en este tablero por otras búsquedas
+    deadlock = initial_state.level.deadlock
+    if deadlock is not None:
+        for pattern in cache.get_patterns(initial_state.level):
+            deadlock.add(pattern)
+
+    solution, explored = solve(algorithm, initial_state, heuristic=heuristic, **options)
+    store_result(cache, key, initial_state, mode, solution, stats)
+    return solution, explored, False
+
+
+def store_result(cache, key, initial_state, mode, solution, stats):
+    """Guarda en la caché lo que probó una búsqueda terminada."""
+    if stats.status == "solved":
+        cache.put_solution(key, solution, stats.expanded)
+    elif stats.status == "exhausted":
+        # un agotamiento con macro-movimientos no prueba que no haya solución
+        if _variant(initial_state, mode) != "pushes+macros":
+            cache.put_bound(initial_state, mode, DEAD)
+    elif stats.bound and proves_bound(initial_state, mode):
+        cache.put_bound(initial_state, mode, stats.bound)
+    if initial_state.level.deadlock is not None:
+        cache.put_patterns(initial_state.level, initial_state.level.deadlock.known())
@@ -0,0 +1,135 @@
+"""
+Detección de bloqueos (deadlocks) alrededor de la caja recién empujada.
+
+Complementa la tabla de casillas muertas de Level (una caja sola que ya no
+puede llegar a ninguna meta) con bloqueos entre varias cajas:
+- bloque 2x2: cuatro celdas en cuadrado ocupadas por paredes o cajas
+- congelamiento: cajas que no pueden moverse ni en vertical ni en
+  horizontal, apoyadas en paredes, casillas muertas u otras cajas
+  congeladas
+En ambos casos es un bloqueo si alguna de las cajas no está en una meta.
+
+Los bloqueos encontrados se guardan como patrones (máscara de las cajas
+implicadas). Añadir cajas nunca libera una caja congelada, así que
+cualquier estado que contenga un patrón conocido es un bloqueo y se
+descarta sin repetir la búsqueda. Los patrones solo dependen del tablero,
+así que cache.py los guarda entre ejecuciones (known / add).
+
+Se activa asignando el detector a level.deadlock; step_successors y
+push_successors lo consultan en cada empuje:
+
+    level.deadlock = DeadlockDetector(level)
+"""
+from level import iter_cells
+
+
+class DeadlockDetector:
+    def __init__(self, level):
+        self.level = level
+        # celda -> máscaras de patrones bloqueados que contienen esa celda
+        self.patterns = {}
+        # contadores (para benchmarks)
+        self.checks = 0
+        self.pattern_hits = 0
+        self.found = 0
+
+    def __call__(self, box_bits, cell):
+        """True si empujar una caja hasta cell deja el estado bloqueado."""
+        self.checks += 1
+        for pattern in self.patterns.get(cell, ()):
+            if box_bits & pattern == pattern:
+                self.pattern_hits += 1
+                return True
+
+        pattern = self._square(box_bits, cell) or self._freeze(box_bits, cell)
+        if pattern:
+            self.found += 1
+            self.add(pattern)
+            return True
+        return False
+
+    def add(self, pattern):
+        """Registra un patrón bloqueado (p. ej. uno guardado en la caché)."""
+        first = pattern.bit_length() - 1
+        if pattern in self.patterns.get(first, ()):
+            return
+        for member in iter_cells(pattern):
+            self.patterns.setdefault(member, []).append(pattern)
+
+    def known(self):
+        """Conjunto de patrones bloqueados conocidos."""
+        return {pattern for patterns in self.patterns.values() for pattern in patterns}
+
+    # ---------------------------
+    # Bloque 2x2
+    # ---------------------------
+    def _square(self, box_bits, cell):
+        """Máscara de las cajas de un cuadrado 2x2 bloqueado que contiene cell, o 0."""
+        neighbors = self.level.neighbors
+        for vd in (0, 1):
+            for hd in (2, 3):
+                vertical = neighbors[vd][cell]
+                horizontal = neighbors[hd][cell]
+                # la esquina opuesta se alcanza desde cualquiera de los dos vecinos
+                if vertical >= 0:
+                    corner = neighbors[hd][vertical]
+                elif horizontal >= 0:
+                    corner = neighbors[vd][horizontal]
+                else:
+                    corner = -1
+
+                boxes = 1 << cell
+                for other in (vertical, horizontal, corner):
+                    if other < 0:
+                        continue  # pared
+                    if not box_bits >> other & 1:
+                        break
+                    boxes |= 1 << other
+                else:
+                    if boxes & ~self.level.goals:
+                        return boxes
+        return 0
+
+    # ---------------------------
+    # Congelamiento
+    # ---------------------------
+    def _freeze(self, box_bits, cell):
+        """Máscara de las cajas congeladas junto con cell, o 0 si no hay bloqueo."""
+        frozen = []
+        if not self._frozen(box_bits, cell, {cell}, frozen):
+            return 0
+        pattern = 0
+        for member in frozen:
+            pattern |= 1 << member
+        return pattern if pattern & ~self.level.goals else 0
+
+    def _frozen(self, box_bits, cell, walls, frozen):
+        """
+        True si la caja de cell no puede moverse en ningún eje. Las cajas en
+        walls (las que se están evaluando) cuentan como pared para no entrar
+        en ciclos. Las cajas congeladas se añaden a frozen.
+        """
+        start = len(frozen)
+        for axis in (0, 2):
+            if not self._blocked(box_bits, cell, axis, walls, frozen):
+                # descartar las cajas que solo estaban congeladas contando
+                # esta como pared
+                del frozen[start:]
+                return False
+        frozen.append(cell)
+        return True
+
+    def _blocked(self, box_bits, cell, axis, walls, frozen):
+        """True si la caja no puede moverse en el eje (0 vertical, 2 horizontal)."""
+        level = self.level
+        first = level.neighbors[axis][cell]
+        second = level.neighbors[axis + 1][cell]
+        if first < 0 or second < 0 or first in walls or second in walls:
+            return True
+        dead = level.dead
+        if dead[first] and dead[second]:
+            return True
+        for side in (first, second):
+            if box_bits >> side & 1 and self._frozen(box_bits, side, walls | {side}, frozen):
+                return True
+        return False
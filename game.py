@@ -1,8 +1,58 @@
+import os
 import tkinter as tk
-from PIL import Image, ImageTk
+from level import iter_cells
+from replay import ReplayError, replay_steps
 from state import State
 
-TILE_SIZE = 50  # tamaño pixel
+TILE_SIZE = 50  # tamaño pixel máximo
+TILE_SIZES = (50, 40, 32, 24, 16, 12)  # variantes escaladas (de mayor a menor)
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+SPRITES = {
+    "#": "wall.png",
+    ".": "goal.png",
+    "$": "box.png",
+    "@": "player.png",
+    " ": "floor.png",
+}
+
+# Caché de sprites de todo el proceso:
+# - _sources: imagen original de cada sprite (una lectura de disco)
+# - _sprites: (símbolo, tamaño) -> PhotoImage ya escalada
+_sources = {}
+_sprites = {}
+
+
+def get_sprite(symbol, size):
+    """Devuelve el sprite escalado a size x size, cargándolo la primera vez."""
+    # PIL se importa al dibujar el primer sprite, no al arrancar la aplicación
+    from PIL import Image, ImageTk
+
+    key = (symbol, size)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        source = _sources.get(symbol)
+        if source is None:
+            source = Image.open(os.path.join(ASSETS_DIR, SPRITES[symbol]))
+            source.load()
+            _sources[symbol] = source
+        sprite = ImageTk.PhotoImage(source.resize((size, size)))
+        _sprites[key] = sprite
+    return sprite
+
+
+def fit_tile_size(root, columns, rows, width_share=0.6, height_share=0.8):
+    """
+    Mayor tamaño de TILE_SIZES con el que el nivel cabe en pantalla
+    (usando una fracción del ancho y del alto de la pantalla).
+    """
+    max_width = root.winfo_screenwidth() * width_share
+    max_height = root.winfo_screenheight() * height_share
+    for size in TILE_SIZES:
+        if columns * size <= max_width and rows * size <= max_height:
+            return size
+    return TILE_SIZES[-1]
+
 
 class SokobanGame:
     def __init__(self, root, level, initial_state, solution=None, exploration = None):
@@ -10,96 +60,129 @@ class SokobanGame:
         self.level = level
         self.initial_state = initial_state
         self.solution = solution or []
-        self.exploration = exploration or []
+        # traza acotada de la búsqueda (lista o cualquier iterable de estados)
+        self.exploration = list(exploration or [])
         self.step = 0
+        self.animation_id = None
+
+        # Items del canvas que se mueven entre frames (ver draw_board)
+        self.box_items = None   # celda -> item de la caja
+        self.player_item = None
+        self.drawn_boxes = 0    # máscara de cajas del último estado dibujado
+        self.frames = None      # (jugador, desde, hasta) de cada paso de la solución
+
+        # tamaño de casilla para que el nivel quepa en pantalla
+        columns = max(len(row) for row in level)
+        self.tile = fit_tile_size(root, columns, len(level))
 
         self.canvas = tk.Canvas(
             root,
-            width=len(level[0]) * TILE_SIZE,
-            height=len(level) * TILE_SIZE
+            width=columns * self.tile,
+            height=len(level) * self.tile
         )
         self.canvas.pack(side="left")
 
-        # cargar sprites
-        self.images = {
-            "#": ImageTk.PhotoImage(Image.open("assets/wall.png").resize((TILE_SIZE, TILE_SIZE))),
-            ".": ImageTk.PhotoImage(Image.open("assets/goal.png").resize((TILE_SIZE, TILE_SIZE))),
-            "$": ImageTk.PhotoImage(Image.open("assets/box.png").resize((TILE_SIZE, TILE_SIZE))),
-            "@": ImageTk.PhotoImage(Image.open("assets/player.png").resize((TILE_SIZE, TILE_SIZE))),
-            " ": ImageTk.PhotoImage(Image.open("assets/floor.png").resize((TILE_SIZE, TILE_SIZE)))
-        }
+        # sprites desde la caché compartida (sin releer ni reescalar)
+        self.images = {symbol: get_sprite(symbol, self.tile) for symbol in SPRITES}
 
     def draw_board(self, state: State):
-        """Dibuja el tablero según un estado concreto"""
+        """
+        Dibuja el tablero según un estado concreto.
+        La capa estática (suelo, paredes, metas) se dibuja una sola vez; en
+        los siguientes frames solo se mueven los items de las cajas que
+        cambiaron respecto al estado anterior y el del jugador.
+        """
+        level = state.level
+        if self.box_items is None:
+            self.draw_static(level)
+            self.box_items = {}
+            for cell in iter_cells(state.box_bits):
+                x, y = level.coords(cell)
+                self.box_items[cell] = self.canvas.create_image(
+                    x * self.tile, y * self.tile,
+                    image=self.images["$"], anchor="nw"
+                )
+            px, py = state.player
+            self.player_item = self.canvas.create_image(
+                px * self.tile, py * self.tile,
+                image=self.images["@"], anchor="nw"
+            )
+        else:
+            # cajas que salieron de una celda y cajas que llegaron a otra
+            gone = self.drawn_boxes & ~state.box_bits
+            came = state.box_bits & ~self.drawn_boxes
+            for old_cell, new_cell in zip(iter_cells(gone), iter_cells(came)):
+                item = self.box_items.pop(old_cell)
+                self.box_items[new_cell] = item
+                x, y = level.coords(new_cell)
+                self.canvas.coords(item, x * self.tile, y * self.tile)
+
+            px, py = state.player
+            self.canvas.coords(self.player_item, px * self.tile, py * self.tile)
+
+        self.drawn_boxes = state.box_bits
+
+    def draw_step(self, level, pos, origin, target):
+        """
+        Aplica un paso de replay.iter_replay sobre el tablero ya dibujado:
+        mueve el jugador y, si empujó, solo la caja de origin a target.
+        """
+        if origin >= 0:
+            item = self.box_items.pop(origin)
+            self.box_items[target] = item
+            x, y = level.coords(target)
+            self.canvas.coords(item, x * self.tile, y * self.tile)
+            self.drawn_boxes ^= (1 << origin) | (1 << target)
+        x, y = level.coords(pos)
+        self.canvas.coords(self.player_item, x * self.tile, y * self.tile)
+
+    def draw_static(self, level):
+        """Capa fija: suelo, paredes y metas (una vez por tablero)."""
         self.canvas.delete("all")
+        goals = level.to_positions(level.goals)
 
         for y, row in enumerate(self.level):
             for x, cell in enumerate(row):
                 # siempre dibujar primero el suelo
                 self.canvas.create_image(
-                    x * TILE_SIZE, y * TILE_SIZE,
+                    x * self.tile, y * self.tile,
                     image=self.images[" "], anchor="nw"
                 )
 
                 # paredes fijas
                 if cell == "#":
                     self.canvas.create_image(
-                        x * TILE_SIZE, y * TILE_SIZE,
+                        x * self.tile, y * self.tile,
                         image=self.images["#"], anchor="nw"
                     )
 
                 # metas fijas
-                if (x, y) in state.goals:
+                if (x, y) in goals:
                     self.canvas.create_image(
-                        x * TILE_SIZE, y * TILE_SIZE,
+                        x * self.tile, y * self.tile,
                         image=self.images["."], anchor="nw"
                     )
 
-        # cajas dinámicas
-        for bx, by in state.boxes:
-            self.canvas.create_image(
-                bx * TILE_SIZE, by * TILE_SIZE,
-                image=self.images["$"], anchor="nw"
-            )
-
-        # jugador dinámico
-        px, py = state.player
-        self.canvas.create_image(
-            px * TILE_SIZE, py * TILE_SIZE,
-            image=self.images["@"], anchor="nw"
-        )
-
     #Muestra la solucion final
     def animate_solution(self, state: State):
-        """Ejecuta la solución paso a paso"""
-        if self.step >= len(self.solution):
+        """
+        Ejecuta la solución paso a paso desde state. Los movimientos se
+        validan y se convierten en diferencias de cajas una sola vez (ver
+        replay.py); cada frame solo mueve los items que cambian.
+        """
+        if self.step == 0:
+            try:
+                self.frames = replay_steps(state.level, state.pos, state.box_bits, self.solution)
+            except ReplayError as error:
+                print("Solución inválida:", error)
+                return
+            self.draw_board(state)
+        if self.step >= len(self.frames):
             return
 
-        move = self.solution[self.step]
-        dx, dy = {"U": (0, -1), "D": (0, 1), "L": (-1, 0), "R": (1, 0)}[move]
-
-        new_player = (state.player[0] + dx, state.player[1] + dy)
-        new_boxes = set(state.boxes)
-
-        # si empuja caja
-        if new_player in new_boxes:
-            new_box = (new_player[0] + dx, new_player[1] + dy)
-            new_boxes.remove(new_player)
-            new_boxes.add(new_box)
-
-        next_state = State(
-            new_player,
-            new_boxes,
-            state.goals,
-            state.level,
-            parent=state,
-            action=move,
-            cost=state.cost + 1
-        )
-
-        self.draw_board(next_state)
+        self.draw_step(state.level, *self.frames[self.step])
         self.step += 1
-        self.animation_id  = self.root.after(500, lambda: self.animate_solution(next_state))
+        self.animation_id = self.root.after(500, lambda: self.animate_solution(state))
 
     #Muestra todos los estados posibles dependiendo del algoritmo
     def animate_exploration(self):
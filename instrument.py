@@ -0,0 +1,158 @@
+"""
+Instrumentación opcional de las búsquedas (bfs y a_star).
+
+    profile = Profile(cprofile="busqueda.prof")
+    path, _ = a_star(state, "matching", profile=profile)
+    print(profile.summary())
+
+Con profile=None (por defecto) los bucles de búsqueda no cambian: no hay
+comprobaciones ni llamadas extra. Con un Profile, la búsqueda se ejecuta a
+través de Profile.run, que le pasa versiones cronometradas de las
+funciones calientes (parámetro hooks de bfs y a_star):
+- expand: EXPANDERS[modo] (State.expand / State.expand_pushes), que
+  incluye el hash Zobrist de cada sucesor (se actualiza con XOR a partir
+  del padre al crearlo)
+- deadlock: el detector level.deadlock (incluido en el tiempo de expand)
+- heuristic: la heurística de A*
+- heap: heappush / heappop de la frontera de A*
+No se modifica nada global: solo el detector del nivel perfilado se
+sustituye mientras dura la búsqueda, así que otros hilos (o búsquedas
+perfiladas a la vez sobre otros niveles) no se ven afectados. En modo
+compacto los sucesores salen de Level y no de EXPANDERS, así que expand
+no se mide.
+
+Además cada CHECK_EVERY extracciones guarda una muestra (tiempo,
+expandidos, tamaño de frontera, estados guardados) y, con cprofile, vuelca
+las estadísticas de cProfile en formato pstats (compatible con snakeviz,
+flameprof y similares).
+"""
+import heapq
+import time
+
+import search
+
+
+class Profile:
+    def __init__(self, cprofile=None):
+        self.cprofile = cprofile
+        self.timers = {}   # fase -> segundos
+        self.calls = {}    # fase -> llamadas
+        self.deadlock_pruned = 0
+        self.samples = []  # (segundos, expandidos, frontera, guardados)
+        self.counters = {}
+        self.elapsed = 0.0
+
+    # ---------------------------
+    # Cronómetros
+    # ---------------------------
+    def timed(self, phase, function):
+        """Envuelve function acumulando su tiempo y sus llamadas en phase."""
+        timers, calls = self.timers, self.calls
+        timers.setdefault(phase, 0.0)
+        calls.setdefault(phase, 0)
+        clock = time.perf_counter
+
+        def wrapper(*args):
+            start = clock()
+            result = function(*args)
+            timers[phase] += clock() - start
+            calls[phase] += 1
+            return result
+        return wrapper
+
+    def _deadlock(self, detector):
+        timed = self.timed("deadlock", detector)
+
+        def wrapper(box_bits, cell):
+            dead = timed(box_bits, cell)
+            if dead:
+                self.deadlock_pruned += 1
+            return dead
+        return wrapper
+
+    def _sampler(self, progress, started):
+        def sample(stats, frontier_size, f):
+            self.samples.append((round(time.perf_counter() - started, 4), stats.expanded,
+                                 frontier_size, stats.pushes))
+            if progress is not None:
+                progress(stats, frontier_size, f)
+        return sample
+
+    # ---------------------------
+    # Ejecución
+    # ---------------------------
+    def run(self, algorithm, initial_state, *args, mode="steps", stats=None, progress=None, **options):
+        """
+        Ejecuta algorithm (search.bfs o search.a_star) con las funciones
+        calientes cronometradas y devuelve su resultado.
+        """
+        if stats is None:
+            stats = search.SearchStats()
+        if args:
+            # heurística de a_star (función o nombre)
+            heuristic = search.get_heuristic(args[0])
+            args = (self.timed("heuristic", heuristic),) + args[1:]
+
+        hooks = {
+            "expand": self.timed("expand", search.EXPANDERS[mode]),
+            "heappush": self.timed("heap", heapq.heappush),
+            "heappop": self.timed("heap", heapq.heappop),
+        }
+        level = initial_state.level
+        detector = level.deadlock
+        if detector is not None:
+            level.deadlock = self._deadlock(detector)
+
+        started = time.perf_counter()
+        options.update(mode=mode, stats=stats, progress=self._sampler(progress, started), hooks=hooks)
+        try:
+            if self.cprofile:
+                import cProfile  # solo al pedir el volcado de cProfile
+                profiler = cProfile.Profile()
+                result = profiler.runcall(algorithm, initial_state, *args, **options)
+                profiler.dump_stats(self.cprofile)
+            else:
+                result = algorithm(initial_state, *args, **options)
+        finally:
+            self.elapsed = time.perf_counter() - started
+            level.deadlock = detector
+            self._collect(stats)
+        return result
+
+    def _collect(self, stats):
+        # los estados repetidos son los generados que no entraron a la frontera
+        self.counters = {
+            "expanded": stats.expanded,
+            "generated": stats.generated,
+            "duplicates": max(stats.generated - (stats.pushes - 1), 0),
+            "deadlock_pruned": self.deadlock_pruned,
+            "stale_pops": stats.stale_pops,
+            "peak_frontier": max((sample[2] for sample in self.samples), default=0),
+            "stored": stats.pushes,
+        }
+
+    # ---------------------------
+    # Resultados
+    # ---------------------------
+    def as_dict(self):
+        return {
+            "elapsed": round(self.elapsed, 4),
+            "timers": {phase: round(seconds, 4) for phase, seconds in self.timers.items()},
+            "calls": dict(self.calls),
+            "counters": dict(self.counters),
+            "samples": list(self.samples),
+        }
+
+    def summary(self):
+        """Resumen en texto (una línea por fase y por contador)."""
+        lines = [f"Tiempo total: {self.elapsed:.3f} s"]
+        for phase, seconds in sorted(self.timers.items(), key=lambda item: -item[1]):
+            if not self.calls[phase]:
+                continue
+            share = seconds / self.elapsed * 100 if self.elapsed else 0
+            lines.append(f"{phase:10s} {seconds:8.3f} s {share:5.1f}%  ({self.calls[phase]} llamadas)")
+        for name, value in self.counters.items():
+            lines.append(f"{name}: {value}")
+        if self.cprofile:
+            lines.append(f"cProfile: {self.cprofile}")
+        return "\n".join(lines)
@@ -0,0 +1,387 @@
+from collections import deque
+import random
+
+# Direcciones en orden fijo: el índice se usa en las tablas de vecinos.
+# La dirección opuesta de d es d ^ 1 (U<->D, L<->R).
+DIRECTIONS = "UDLR"
+
+# Tablas Zobrist: semilla fija (mismos hashes en todas las ejecuciones) y
+# 60 bits por número. Python reduce el hash de un entero módulo 2**61 - 1;
+# con menos de 61 bits el XOR nunca llega al módulo y hash(estado) es el
+# propio hash Zobrist, que los sucesores pueden seguir actualizando.
+ZOBRIST_SEED = 0x5A0B
+ZOBRIST_BITS = 60
+
+
+class Level:
+    """
+    Datos estáticos de un nivel Sokoban, compartidos por todos los estados.
+
+    Las celdas se numeran de forma plana: indice = y * width + x.
+    - rows: el mapa original (lista de strings), usado para dibujar
+    - walls: bytearray con 1 en las celdas que son pared
+    - goals: máscara de bits con las metas
+    - start: celda inicial del jugador
+
+    Al construirse precalcula (una sola vez) el índice estático del nivel:
+    - floor: celdas interiores alcanzables por el jugador
+    - neighbors: neighbors[d][celda] = celda vecina en la dirección d, o -1
+    - dead: celdas desde las que ninguna caja puede llegar a una meta
+    - distances: distances[i][celda] = empujes mínimos hasta goal_cells[i], o -1
+    - zobrist_boxes / zobrist_player: un número aleatorio de 60 bits por
+      celda; el hash Zobrist de un estado es el XOR de los de sus cajas y
+      el de su jugador (ver zobrist)
+
+    deadlock es un detector opcional de bloqueos entre cajas (ver
+    deadlock.DeadlockDetector): deadlock(cajas, celda) se consulta tras cada
+    empuje que deja una caja en celda. None lo desactiva.
+
+    macros es un planificador opcional de macro-movimientos (ver
+    analysis.LevelAnalysis): macros(celda, d, cajas) devuelve la lista de
+    empujes que ejecuta un empuje (túneles) y macros.goal_macro(...) la de
+    un empuje alternativo hasta una meta, o None. Solo lo usan
+    push_successors y push_path. None lo desactiva.
+    """
+    __slots__ = ("rows", "width", "height", "walls", "goals", "goal_cells", "start",
+                 "floor", "neighbors", "dead", "distances", "deadlock",
+                 "zobrist_boxes", "zobrist_player", "macros")
+
+    def __init__(self, rows, goals, start):
+        self.rows = rows
+        self.width = max(len(row) for row in rows)
+        self.height = len(rows)
+        self.walls = bytearray(self.width * self.height)
+
+        for y in range(self.height):
+            row = rows[y]
+            for x in range(self.width):
+                # las filas cortas se completan con pared
+                if x >= len(row) or row[x] == "#":
+                    self.walls[y * self.width + x] = 1
+
+        self.goal_cells = tuple(sorted(self.index(x, y) for (x, y) in goals))
+        self.goals = self.to_bits(goals)
+        self.start = self.index(*start)
+        self.deadlock = None
+        self.macros = None
+
+        self._build_index()
+
+        rng = random.Random(ZOBRIST_SEED)
+        size = self.width * self.height
+        self.zobrist_boxes = tuple(rng.getrandbits(ZOBRIST_BITS) for _ in range(size))
+        self.zobrist_player = tuple(rng.getrandbits(ZOBRIST_BITS) for _ in range(size))
+
+    # ---------------------------
+    # Preprocesado estático
+    # ---------------------------
+    def _build_index(self):
+        """Construye floor, las tablas de vecinos y las casillas muertas."""
+        width, height = self.width, self.height
+        size = width * height
+        deltas = (-width, width, -1, 1)
+
+        # 1. Celdas interiores: relleno desde el jugador ignorando cajas
+        self.floor = bytearray(size)
+        self.floor[self.start] = 1
+        queue = deque([self.start])
+        while queue:
+            cell = queue.popleft()
+            x, y = cell % width, cell // width
+            for d, delta in enumerate(deltas):
+                if not self._inside(x, y, d):
+                    continue
+                nxt = cell + delta
+                if not self.walls[nxt] and not self.floor[nxt]:
+                    self.floor[nxt] = 1
+                    queue.append(nxt)
+
+        # 2. Tablas de vecinos (-1 = pared o fuera del interior)
+        self.neighbors = tuple([-1] * size for _ in deltas)
+        for cell in range(size):
+            if not self.floor[cell]:
+                continue
+            x, y = cell % width, cell // width
+            for d, delta in enumerate(deltas):
+                if self._inside(x, y, d) and self.floor[cell + delta]:
+                    self.neighbors[d][cell] = cell + delta
+
+        # 3. Distancias de empuje por meta y casillas muertas: lo que no
+        #    alcanza ningún "tirón" inverso desde una meta
+        self.distances = tuple(self._pull_distances(goal) for goal in self.goal_cells)
+        live = bytearray(size)
+        for dist in self.distances:
+            for cell in range(size):
+                if dist[cell] >= 0:
+                    live[cell] = 1
+        self.dead = bytearray(self.floor[cell] and not live[cell] for cell in range(size))
+
+    def _inside(self, x, y, d):
+        """Indica si el vecino de (x, y) en la dirección d queda dentro del mapa."""
+        if d == 0:
+            return y > 0
+        if d == 1:
+            return y < self.height - 1
+        if d == 2:
+            return x > 0
+        return x < self.width - 1
+
+    def _pull_distances(self, goal):
+        """
+        BFS de tirones inversos desde una meta (sin otras cajas).
+        Devuelve, por celda, el mínimo de empujes para llevar una caja desde
+        esa celda hasta la meta, o -1 si es imposible.
+        """
+        neighbors = self.neighbors
+        dist = [-1] * (self.width * self.height)
+        dist[goal] = 0
+        queue = deque([goal])
+        while queue:
+            cell = queue.popleft()
+            for d in range(4):
+                # el jugador se para en 'prev' y retrocede hasta 'back',
+                # arrastrando la caja de 'cell' a 'prev'
+                prev = neighbors[d][cell]
+                if prev < 0:
+                    continue
+                back = neighbors[d][prev]
+                if back < 0 or dist[prev] >= 0:
+                    continue
+                dist[prev] = dist[cell] + 1
+                queue.append(prev)
+        return dist
+
+    # ---------------------------
+    # Alcance del jugador (modo empujes)
+    # ---------------------------
+    def reachable(self, pos, box_bits):
+        """Celdas que el jugador alcanza desde pos sin empujar cajas."""
+        neighbors = self.neighbors
+        seen = {pos}
+        stack = [pos]
+        while stack:
+            cell = stack.pop()
+            for table in neighbors:
+                nxt = table[cell]
+                if nxt >= 0 and nxt not in seen and not box_bits >> nxt & 1:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+    def walk_path(self, source, target, box_bits):
+        """Camino más corto del jugador (lista de "U","D","L","R") sin empujar cajas."""
+        neighbors = self.neighbors
+        came_from = {source: None}
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            if cell == target:
+                break
+            for d, table in enumerate(neighbors):
+                nxt = table[cell]
+                if nxt >= 0 and nxt not in came_from and not box_bits >> nxt & 1:
+                    came_from[nxt] = (cell, d)
+                    queue.append(nxt)
+
+        path = []
+        cell = target
+        while came_from[cell] is not None:
+            cell, d = came_from[cell]
+            path.append(DIRECTIONS[d])
+        return list(reversed(path))
+
+    def push_path(self, pos, box_bits, codes, macros=True):
+        """
+        Convierte una secuencia de códigos de empuje (ver push_successors) en
+        el camino completo paso a paso, partiendo del jugador en pos. Con
+        macros (y self.macros activo) cada empuje se desarrolla en los
+        empujes de su macro-movimiento, igual que en push_successors.
+        """
+        planner = self.macros if macros else None
+        path = []
+        for code in codes:
+            if code < 0:
+                pushes = planner.goal_macro(~code >> 2, ~code & 3, box_bits)
+            elif planner is not None:
+                pushes = planner(code >> 2, code & 3, box_bits)
+            else:
+                pushes = ((code >> 2, code & 3),)
+            for cell, d in pushes:
+                # el jugador camina hasta el lado opuesto de la caja y empuja
+                side = self.neighbors[d ^ 1][cell]
+                path.extend(self.walk_path(pos, side, box_bits))
+                path.append(DIRECTIONS[d])
+                box_bits ^= (1 << cell) | (1 << self.neighbors[d][cell])
+                pos = cell
+        return path
+
+    # ---------------------------
+    # Sucesores sobre (pos, box_bits), sin crear objetos State
+    # ---------------------------
+    def step_successors(self, pos, box_bits):
+        """
+        Movimientos de un paso del jugador: lista de (d, nuevo_pos, nuevas_cajas).
+        Descarta paredes, empujes bloqueados, cajas empujadas a casillas muertas
+        y, si hay detector, empujes que dejan un bloqueo.
+        """
+        dead = self.dead
+        deadlock = self.deadlock
+        result = []
+        for d, table in enumerate(self.neighbors):
+            new_player = table[pos]
+
+            # 1. Si choca con pared, no es válido
+            if new_player < 0:
+                continue
+
+            new_boxes = box_bits
+
+            # 2. Si hay caja en la nueva posición del jugador
+            if box_bits >> new_player & 1:
+                new_box = table[new_player]
+
+                # Si detrás hay pared, caja o casilla muerta → no se empuja
+                if new_box < 0 or box_bits >> new_box & 1 or dead[new_box]:
+                    continue
+
+                # Mover la caja
+                new_boxes ^= (1 << new_player) | (1 << new_box)
+                if deadlock is not None and deadlock(new_boxes, new_box):
+                    continue
+
+            result.append((d, new_player, new_boxes))
+        return result
+
+    def push_successors(self, pos, box_bits, macros=True):
+        """
+        Empujes de caja (macro-movimientos): lista de (código, nuevo_pos, nuevas_cajas)
+        con código = celda_caja * 4 + d. El jugador se normaliza a la celda
+        superior izquierda (índice mínimo) de su región alcanzable. Con
+        macros (y self.macros activo) el código es el primer empuje del
+        macro-movimiento y el resultado, el estado tras todos sus empujes;
+        los macro-movimientos hasta una meta se añaden como sucesores
+        aparte, con código ~(celda_caja * 4 + d).
+        """
+        neighbors = self.neighbors
+        dead = self.dead
+        planner = self.macros if macros else None
+        reach = self.reachable(pos, box_bits)
+
+        result = []
+        for cell in iter_cells(box_bits):
+            for d in range(4):
+                # el jugador debe poder llegar al lado opuesto de la caja
+                side = neighbors[d ^ 1][cell]
+                if side < 0 or side not in reach:
+                    continue
+
+                new_box = neighbors[d][cell]
+                if new_box < 0 or box_bits >> new_box & 1 or dead[new_box]:
+                    continue
+
+                if planner is None:
+                    self._add_push(result, box_bits, cell * 4 + d, ((cell, d),))
+                    continue
+                pushes = planner(cell, d, box_bits)
+                self._add_push(result, box_bits, cell * 4 + d, pushes)
+                goal_pushes = planner.goal_macro(cell, d, box_bits)
+                if goal_pushes is not None and goal_pushes != pushes:
+                    self._add_push(result, box_bits, ~(cell * 4 + d), goal_pushes)
+        return result
+
+    def _add_push(self, result, box_bits, code, pushes):
+        """Añade a result el estado tras aplicar pushes (descarta bloqueos)."""
+        # el jugador queda donde estaba la caja en el último empuje
+        last, last_d = pushes[-1]
+        new_box = self.neighbors[last_d][last]
+        new_boxes = box_bits ^ ((1 << pushes[0][0]) | (1 << new_box))
+        if self.deadlock is not None and self.deadlock(new_boxes, new_box):
+            return
+        result.append((code, min(self.reachable(last, new_boxes)), new_boxes))
+
+    # ---------------------------
+    # Búsqueda inversa (tirones)
+    # ---------------------------
+    def goal_starts(self):
+        """
+        Posiciones iniciales de la búsqueda inversa: todas las cajas en sus
+        metas y el jugador en cada región libre (celda mínima de la región).
+        """
+        starts = []
+        seen = set()
+        for cell in range(self.width * self.height):
+            if self.floor[cell] and not self.goals >> cell & 1 and cell not in seen:
+                seen |= self.reachable(cell, self.goals)
+                starts.append(cell)
+        return starts
+
+    def pull_successors(self, pos, box_bits):
+        """
+        Tirones de caja: lista de (código, nuevo_pos, nuevas_cajas). El jugador,
+        junto a una caja, retrocede una casilla arrastrándola. código es el
+        empuje hacia adelante (celda_caja * 4 + d) que deshace el tirón desde
+        el estado nuevo, con el mismo formato que push_successors.
+        """
+        neighbors = self.neighbors
+        reach = self.reachable(pos, box_bits)
+
+        result = []
+        for cell in iter_cells(box_bits):
+            for d in range(4):
+                # el jugador está en 'side' y retrocede hasta 'back'
+                side = neighbors[d][cell]
+                if side < 0 or side not in reach:
+                    continue
+                back = neighbors[d][side]
+                if back < 0 or box_bits >> back & 1:
+                    continue
+
+                new_boxes = box_bits ^ ((1 << cell) | (1 << side))
+                new_player = min(self.reachable(back, new_boxes))
+                result.append((side * 4 + (d ^ 1), new_player, new_boxes))
+        return result
+
+    # ---------------------------
+    # Hash Zobrist
+    # ---------------------------
+    def zobrist(self, pos, box_bits):
+        """
+        Hash Zobrist de (pos, box_bits), calculado desde cero.
+        Los sucesores lo actualizan con XOR en lugar de recalcularlo: un
+        paso cambia el jugador y, si empuja, una caja (ver State.expand).
+        """
+        zobrist_boxes = self.zobrist_boxes
+        result = self.zobrist_player[pos]
+        for cell in iter_cells(box_bits):
+            result ^= zobrist_boxes[cell]
+        return result
+
+    # ---------------------------
+    # Conversión de coordenadas
+    # ---------------------------
+    def index(self, x, y):
+        """(x, y) -> índice plano de la celda."""
+        return y * self.width + x
+
+    def coords(self, cell):
+        """Índice plano -> (x, y)."""
+        return (cell % self.width, cell // self.width)
+
+    def to_bits(self, positions):
+        """Convierte posiciones (x, y) en una máscara de bits."""
+        bits = 0
+        for (x, y) in positions:
+            bits |= 1 << self.index(x, y)
+        return bits
+
+    def to_positions(self, bits):
+        """Convierte una máscara de bits en un frozenset de posiciones (x, y)."""
+        return frozenset(self.coords(cell) for cell in iter_cells(bits))
+
+
+def iter_cells(bits):
+    """Itera los índices de celda activos en una máscara de bits."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
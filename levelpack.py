@@ -0,0 +1,217 @@
+"""
+Colecciones de niveles en formato XSB / .sok (texto plano).
+
+Es el formato de las colecciones públicas de Sokoban: cada nivel es un
+bloque de filas del tablero y entre niveles hay líneas libres (título,
+autor, comentarios con ";"):
+
+    ; 1
+    #####
+    #@$.#
+    #####
+    Title: Primero
+
+Símbolos del tablero: # pared, espacio (o - y _) suelo, $ caja, . meta,
+* caja en meta, @ jugador, + jugador en meta.
+
+LevelPack lee el archivo en streaming: una pasada línea a línea construye
+un índice con la posición en bytes de cada nivel y, a partir de ahí, el
+nivel N se lee con un seek sin tocar el resto del archivo (colecciones de
+miles de niveles sin cargarlas en memoria). iter_levels recorre el archivo
+como generador sin construir el índice.
+
+Cada nivel se valida y normaliza con normalize_level antes de devolverlo,
+así que lo que sale de aquí se puede pasar directamente a utils.parse_level.
+LevelList hace lo mismo con los niveles ya cargados de un .json.
+"""
+
+# Símbolos válidos de una fila del tablero (- y _ son suelo en XSB)
+BOARD_SYMBOLS = frozenset("#@+$*. -_")
+FLOOR_ALIASES = str.maketrans("-_", "  ")
+
+
+# ============================================================
+# Validación y normalización
+# ============================================================
+def normalize_level(rows):
+    """
+    Valida un nivel (lista de strings) y lo devuelve normalizado:
+    - tabuladores expandidos, "-" y "_" convertidos en suelo
+    - sin filas vacías al principio ni al final, ni sangría común a la izquierda
+    - todas las filas con el mismo ancho (las cortas se completan con espacios)
+    Lanza ValueError si el nivel no es jugable: símbolos desconocidos, un
+    jugador distinto de uno, sin cajas, distinto número de cajas que de
+    metas o un jugador que puede salir del tablero.
+    """
+    rows = [row.expandtabs().rstrip().translate(FLOOR_ALIASES) for row in rows]
+    while rows and not rows[0]:
+        rows.pop(0)
+    while rows and not rows[-1]:
+        rows.pop()
+    if not rows:
+        raise ValueError("Nivel vacío")
+
+    for y, row in enumerate(rows):
+        unknown = set(row) - BOARD_SYMBOLS
+        if unknown:
+            raise ValueError(f"Símbolo desconocido en la fila {y}: {''.join(sorted(unknown))!r}")
+
+    indent = min(len(row) - len(row.lstrip()) for row in rows if row)
+    width = max(len(row) for row in rows) - indent
+    rows = [row[indent:].ljust(width) for row in rows]
+
+    players = [(x, y) for y, row in enumerate(rows) for x, cell in enumerate(row) if cell in "@+"]
+    if len(players) != 1:
+        raise ValueError(f"El nivel debe tener un jugador (tiene {len(players)})")
+    boxes = sum(row.count("$") + row.count("*") for row in rows)
+    goals = sum(row.count(".") + row.count("*") + row.count("+") for row in rows)
+    if not boxes:
+        raise ValueError("El nivel no tiene cajas")
+    if boxes != goals:
+        raise ValueError(f"El nivel tiene {boxes} cajas y {goals} metas")
+
+    # el jugador no debe poder salir del rectángulo (nivel abierto)
+    height = len(rows)
+    seen = {players[0]}
+    pending = [players[0]]
+    while pending:
+        x, y = pending.pop()
+        if x in (0, width - 1) or y in (0, height - 1):
+            raise ValueError("El nivel no está cerrado por paredes")
+        for nx, ny in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)):
+            if (nx, ny) not in seen and rows[ny][nx] != "#":
+                seen.add((nx, ny))
+                pending.append((nx, ny))
+    return rows
+
+
+def is_board_line(line):
+    """True si la línea (sin salto de línea) es una fila de tablero."""
+    stripped = line.rstrip()
+    return "#" in stripped and set(stripped.expandtabs()) <= BOARD_SYMBOLS
+
+
+# ============================================================
+# Lectura en streaming
+# ============================================================
+def _scan(file):
+    """
+    Recorre un archivo XSB abierto en binario y genera, por cada nivel,
+    (inicio, fin, título): el rango en bytes de sus filas y su título
+    ("Title: ..." tras el tablero o, si no hay, la última línea de texto
+    antes de él).
+    """
+    offset = 0
+    start = end = None
+    title = previous = None
+    for raw in file:
+        line = raw.decode("utf-8", "replace").rstrip("\r\n")
+        if is_board_line(line):
+            if start is None:
+                start, title, previous = offset, previous, None
+            end = offset + len(raw)
+            offset += len(raw)
+            continue
+        offset += len(raw)
+
+        text = line.strip().lstrip(";").strip()
+        key, colon, value = text.partition(":")
+        if colon and key.strip().lower() == "title":
+            if start is not None:
+                title = value.strip()  # título tras el tablero: sigue siendo el mismo nivel
+            else:
+                previous = value.strip()
+            continue
+        if start is not None:
+            yield start, end, title
+            start = None
+        # "Author: ...", "Comment: ..." y similares no son títulos
+        if text and not (colon and key.strip().isalpha()):
+            previous = text
+    if start is not None:
+        yield start, end, title
+
+
+def _decode(data):
+    """Bytes de un bloque de filas -> lista de filas normalizada."""
+    return normalize_level(data.decode("utf-8", "replace").splitlines())
+
+
+def iter_levels(filename):
+    """Genera (título, filas) de cada nivel del archivo, sin cargarlo entero."""
+    with open(filename, "rb") as scan, open(filename, "rb") as data:
+        for start, end, title in _scan(scan):
+            data.seek(start)
+            yield title, _decode(data.read(end - start))
+
+
+class LevelPack:
+    """
+    Colección XSB con acceso aleatorio: pack[n] devuelve las filas
+    normalizadas del nivel n y len(pack) el número de niveles. El índice de
+    posiciones se construye la primera vez que se necesita (una pasada);
+    luego cada acceso es un seek y una lectura del tamaño del nivel.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._offsets = None  # [(inicio, fin)] de cada nivel
+        self._titles = None
+
+    def _index(self):
+        if self._offsets is None:
+            with open(self.filename, "rb") as f:
+                entries = list(_scan(f))
+            self._offsets = [(start, end) for start, end, _ in entries]
+            self._titles = [title for _, _, title in entries]
+        return self._offsets
+
+    def __len__(self):
+        return len(self._index())
+
+    def __getitem__(self, index):
+        offsets = self._index()
+        if not -len(offsets) <= index < len(offsets):
+            raise IndexError(f"Nivel fuera de rango: {index} (hay {len(offsets)})")
+        start, end = offsets[index]
+        with open(self.filename, "rb") as f:
+            f.seek(start)
+            return _decode(f.read(end - start))
+
+    def __iter__(self):
+        for _, rows in iter_levels(self.filename):
+            yield rows
+
+    def title(self, index):
+        """Título del nivel index, o None si el archivo no lo indica."""
+        self._index()
+        return self._titles[index]
+
+
+class LevelList:
+    """
+    Niveles ya cargados en memoria (listas de strings, p. ej. de un .json)
+    con la misma interfaz que LevelPack: cada nivel se normaliza al pedirlo,
+    así que uno mal formado solo da ValueError al acceder a él y no impide
+    usar los demás.
+    """
+
+    def __init__(self, levels):
+        self._levels = list(levels)
+        self._normalized = {}  # índice -> filas normalizadas
+
+    def __len__(self):
+        return len(self._levels)
+
+    def __getitem__(self, index):
+        if not -len(self._levels) <= index < len(self._levels):
+            raise IndexError(f"Nivel fuera de rango: {index} (hay {len(self._levels)})")
+        index %= len(self._levels)
+        rows = self._normalized.get(index)
+        if rows is None:
+            rows = self._normalized[index] = normalize_level(self._levels[index])
+        return rows
+
+    def __iter__(self):
+        for index in range(len(self._levels)):
+            yield self[index]
@@ -1,21 +1,30 @@
 import tkinter as tk
+import queue
+import sys
+import threading
 import time
+from analysis import LevelAnalysis
 from utils import load_levels, parse_level
-from search import bfs, a_star, heuristic
+from search import SearchStats
+from cache import SolutionCache, solve_cached
+from instrument import Profile
+from tracing import DEFAULT_TRACE
 from game import SokobanGame
-from state_diagram import SokobanDiagram  
-from state_diagram import show_sokoban_diagram
 
 
 class SokobanApp:
-    def __init__(self, root):
+    def __init__(self, root, levels_file="levels.json"):
         self.root = root
         self.root.title("Sokoban AI")
 
-        # Cargar niveles
-        self.levels = load_levels("levels.json")
+        # Cargar niveles (.json o colección XSB / .sok, leída bajo demanda)
+        self.levels = load_levels(levels_file)
         self.current_level_index = tk.IntVar(value=0)
         self.algorithm = tk.StringVar(value="BFS")
+        self.push_mode = tk.BooleanVar(value=False)
+        self.time_limit = tk.IntVar(value=60)
+        self.profile_search = tk.BooleanVar(value=False)
+        self.use_macros = tk.BooleanVar(value=False)
 
         # Panel de controles
         control_frame = tk.Frame(root)
@@ -28,8 +37,19 @@ class SokobanApp:
         tk.Label(control_frame, text="Algoritmo:").pack(anchor="w", pady=(10,0))
         tk.Radiobutton(control_frame, text="BFS", variable=self.algorithm, value="BFS").pack(anchor="w")
         tk.Radiobutton(control_frame, text="A*", variable=self.algorithm, value="A*").pack(anchor="w")
+        tk.Radiobutton(control_frame, text="A* (emparejamiento)", variable=self.algorithm, value="A* Matching").pack(anchor="w")
+        tk.Radiobutton(control_frame, text="IDA* (emparejamiento)", variable=self.algorithm, value="IDA*").pack(anchor="w")
+        tk.Checkbutton(control_frame, text="Solo empujes", variable=self.push_mode).pack(anchor="w")
+        tk.Checkbutton(control_frame, text="Macro-movimientos (empujes)", variable=self.use_macros).pack(anchor="w")
+        tk.Checkbutton(control_frame, text="Perfilar (BFS / A*)", variable=self.profile_search).pack(anchor="w")
 
-        tk.Button(control_frame, text="Resolver", command=self.run_solver).pack(anchor="w", pady=10)
+        tk.Label(control_frame, text="Límite (s):").pack(anchor="w", pady=(10,0))
+        tk.Spinbox(control_frame, from_=1, to=3600, textvariable=self.time_limit, width=5).pack(anchor="w")
+
+        self.solve_btn = tk.Button(control_frame, text="Resolver", command=self.run_solver)
+        self.solve_btn.pack(anchor="w", pady=(10,0))
+        self.cancel_btn = tk.Button(control_frame, text="Cancelar", command=self.cancel_solver, state=tk.DISABLED)
+        self.cancel_btn.pack(anchor="w", pady=(5,10))
         tk.Button(control_frame, text="Mostrar pasos", command=self.show_steps).pack(anchor="w", pady=5)
         self.diagram_btn = tk.Button(control_frame, text="Mostrar Diagrama", command=self.open_diagram_window, state=tk.DISABLED)
         self.diagram_btn.pack(anchor="w", pady=5)
@@ -42,6 +62,8 @@ class SokobanApp:
         self.time_label.pack(anchor="w")
         self.states_label = tk.Label(control_frame, text="N° Estados: -")
         self.states_label.pack(anchor="w")
+        self.progress_label = tk.Label(control_frame, text="", justify="left")
+        self.progress_label.pack(anchor="w", pady=(10,0))
 
         # Canvas
         self.canvas_frame = tk.Frame(root)
@@ -60,30 +82,150 @@ class SokobanApp:
         self.initial_state = None
         self.speed = 200
 
-    # Resolver dado el nivel y el algoritmo
+        # Búsqueda en segundo plano
+        self.worker = None
+        self.cancel_event = None
+        self.messages = queue.Queue()
+        self.solve_started = None
+        self.solve_level = None
+        self.profile = None
+
+        # Soluciones y cotas persistentes entre ejecuciones
+        self.cache = SolutionCache()
+
+    # Resolver dado el nivel y el algoritmo (en un hilo aparte)
     def run_solver(self):
+        if self.worker is not None:
+            return
         level_index = self.current_level_index.get()
-        level = self.levels[level_index]
-        self.initial_state = parse_level(level)
+        try:
+            self.solve_level = self.levels[level_index]
+        except (IndexError, ValueError) as error:
+            self.progress_label.config(text=f"Nivel {level_index} inválido: {error}")
+            return
+        # los macro-movimientos se preparan en el hilo de búsqueda (solver_thread)
+        self.initial_state = parse_level(self.solve_level)
 
         print("Jugador:", self.initial_state.player)
         print("Cajas:", self.initial_state.boxes)
         print("Metas:", self.initial_state.goals)
 
-        # Ejecutar algoritmo con medición de tiempo
-        start_time = time.time()
+        # (la exploración guardada para animar está acotada por DEFAULT_TRACE)
+        mode = "pushes" if self.push_mode.get() else "steps"
+        options = {
+            "mode": mode,
+            "stats": SearchStats(),
+            "trace": DEFAULT_TRACE,
+            "deadline": time.monotonic() + self.time_limit.get(),
+            "cancel": threading.Event(),
+            "progress": self.report_progress,
+        }
+        self.cancel_event = options["cancel"]
+        print(f"=== {self.algorithm.get()} ===")
         if self.algorithm.get() == "BFS":
-            print("=== BFS ===")
-            self.solution, self.explored = bfs(self.initial_state)
+            args = ("bfs", self.initial_state)
+        elif self.algorithm.get() == "IDA*":
+            # memoria acotada: solo el camino actual y una tabla fija
+            options["table_size"] = 1 << 16
+            args = ("ida_star", self.initial_state, self.heuristic())
         else:
-            print("=== A* ===")
-            self.solution, self.explored = a_star(self.initial_state, heuristic)
-        tiempoEjecucion = time.time() - start_time
-        n_states = len(self.explored)
+            args = ("a_star", self.initial_state, self.heuristic())
+
+        # instrumentación opcional (solo bfs y a_star la admiten)
+        self.profile = None
+        if self.profile_search.get() and args[0] in ("bfs", "a_star"):
+            self.profile = options["profile"] = Profile()
+
+        self.solve_btn.config(state=tk.DISABLED)
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.progress_label.config(text="Buscando...")
+        self.solve_started = time.time()
+        self.worker = threading.Thread(target=self.solver_thread, daemon=True,
+                                       args=(args, options, self.use_macros.get()))
+        self.worker.start()
+        self.root.after(100, self.poll_solver)
+
+    def solver_thread(self, args, options, macros=False):
+        """Ejecuta la búsqueda fuera del hilo de Tk y envía el resultado por la cola."""
+        try:
+            if macros:
+                # habitaciones y túneles: no bloquear la interfaz mientras se analizan
+                level = self.initial_state.level
+                level.macros = LevelAnalysis(level)
+            solution, explored, cached = solve_cached(self.cache, *args, **options)
+            self.messages.put(("done", solution, explored, options["stats"], cached))
+        except Exception as error:
+            self.messages.put(("error", error))
+
+    def report_progress(self, stats, frontier_size, f):
+        """Callback de la búsqueda (hilo de trabajo): solo encola el avance."""
+        self.messages.put(("progress", stats.expanded, frontier_size, f))
+
+    def cancel_solver(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.progress_label.config(text="Cancelando...")
+
+    def poll_solver(self):
+        """Consulta la cola del hilo de trabajo desde el hilo de Tk."""
+        finished = None
+        progress = None
+        try:
+            while True:
+                message = self.messages.get_nowait()
+                if message[0] == "progress":
+                    progress = message
+                else:
+                    finished = message
+        except queue.Empty:
+            pass
+
+        if progress and not finished:
+            _, expanded, frontier_size, f = progress
+            elapsed = max(time.time() - self.solve_started, 1e-9)
+            best = "-" if f is None else f
+            self.progress_label.config(
+                text=f"Expandidos: {expanded}\nFrontera: {frontier_size}\n"
+                     f"Nodos/s: {expanded / elapsed:.0f}\nMejor f: {best}")
+
+        if finished:
+            self.finish_solver(finished)
+        else:
+            self.root.after(100, self.poll_solver)
+
+    def finish_solver(self, message):
+        self.worker = None
+        self.cancel_event = None
+        self.solve_btn.config(state=tk.NORMAL)
+        self.cancel_btn.config(state=tk.DISABLED)
+        tiempoEjecucion = time.time() - self.solve_started
+
+        if message[0] == "error":
+            print("Error en la búsqueda:", message[1])
+            self.progress_label.config(text=f"Error: {message[1]}")
+            return
+
+        _, self.solution, self.explored, stats, cached = message
+        n_states = stats.expanded
+        status_text = {
+            "solved": "Resuelto",
+            "exhausted": "Sin solución",
+            "timeout": "Tiempo agotado",
+            "cancelled": "Cancelado",
+        }
+        status = status_text.get(stats.status, "")
+        if cached:
+            status += " (caché)"
+        elif stats.status in ("timeout", "cancelled") and stats.bound:
+            status += f"\nCota inferior: {stats.bound}"
+        self.progress_label.config(text=status)
 
         if self.explored:
             self.diagram_btn.config(state=tk.NORMAL)
 
+        if self.profile is not None and not cached:
+            self.show_profile(self.profile)
+
         # Mostrar métricas si encontramos solucion
         if self.solution:
             print("Solución encontrada:", self.solution)
@@ -106,12 +248,31 @@ class SokobanApp:
             self.game.canvas.destroy()
 
         
-        self.game = SokobanGame(self.canvas_frame, level, self.initial_state , solution = self.solution, exploration = self.explored)
+        self.game = SokobanGame(self.canvas_frame, self.solve_level, self.initial_state , solution = self.solution, exploration = self.explored)
         self.game.draw_board(self.initial_state)
         
         if self.solution:
            self.root.after(100, lambda: self.game.animate_solution(self.initial_state))
 
+    def heuristic(self):
+        """Heurística correspondiente al algoritmo seleccionado."""
+        if self.algorithm.get() in ("A* Matching", "IDA*"):
+            return "matching"
+        return "manhattan"
+
+    def show_profile(self, profile):
+        """Ventana con los tiempos por fase y los contadores de la búsqueda."""
+        window = tk.Toplevel(self.root)
+        window.title("Perfil de la búsqueda")
+        text = tk.Text(window, width=60, height=16, font=("Courier", 10))
+        text.insert("1.0", profile.summary())
+        if profile.samples:
+            last = profile.samples[-1]
+            text.insert("end", f"\nÚltima muestra: {last[0]} s, {last[1]} expandidos, "
+                               f"frontera {last[2]}, guardados {last[3]}")
+        text.config(state=tk.DISABLED)
+        text.pack(fill="both", expand=True)
+
     # Mostrar paso  a paso la solucion
     def show_steps(self):
             """Muestra el paso a paso de la exploración"""
@@ -135,6 +296,8 @@ class SokobanApp:
         if not self.explored:
             print("Primero resuelve un nivel para generar estados explorados.")
             return
+        # matplotlib se carga solo la primera vez que se abre un diagrama
+        from state_diagram import show_sokoban_diagram
 
         diagram_window = tk.Toplevel(self.root)
         diagram_window.title("Diagrama de Estados")
@@ -150,7 +313,8 @@ class SokobanApp:
 
 def main():
     root = tk.Tk()
-    app = SokobanApp(root)
+    # python main.py [archivo de niveles]
+    app = SokobanApp(root, *sys.argv[1:2])
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""
+Portafolio paralelo de resolutores.
+
+Lanza varias configuraciones de búsqueda (algoritmo, heurística, modo) a la
+vez, una por proceso, y se queda con la primera que termina: en cuanto una
+resuelve el nivel (o demuestra que no tiene solución) se terminan las
+demás. Cada configuración es buena en niveles distintos (bidireccional en
+pasillos largos, A* con emparejamiento en niveles abiertos...), así que la
+carrera aprovecha los núcleos libres sin repartir una sola búsqueda.
+
+La solución es la del ganador: no es necesariamente óptima ni en pasos ni
+en empujes. Para medir la aceleración frente a search.a_star en un solo
+proceso:
+
+    python parallel.py --levels 0-20 --time-limit 60
+"""
+import argparse
+import multiprocessing
+import queue
+import time
+
+from batch import parse_selection
+from benchmark import config_name, parse_config
+from search import SearchStats, solve
+from state import State
+from utils import load_levels, parse_level
+
+# Configuraciones por defecto: "algoritmo:heurística:modo"
+DEFAULT_PORTFOLIO = (
+    "bidirectional::pushes",
+    "a_star:matching:pushes",
+    "ida_star:matching:pushes",
+    "a_star:matching:steps",
+    "bfs::pushes",
+)
+
+# Cada cuánto (s) revisa el proceso principal cancelación y límite de tiempo
+POLL_INTERVAL = 0.05
+
+
+def _run_config(index, rows, options, pos, box_bits, config, time_limit, results):
+    """
+    Proceso de trabajo: resuelve con una configuración y envía el resultado.
+    options son los argumentos de utils.parse_level (deadlocks, macros) con
+    los que se construyó el nivel en el proceso principal.
+    """
+    start = parse_level(rows, **options)
+    initial_state = State(start.level, pos, box_bits)
+    stats = SearchStats()
+    deadline = time.monotonic() + time_limit if time_limit else None
+    try:
+        solution, _ = solve(
+            config["algorithm"], initial_state,
+            heuristic=config["heuristic"],
+            mode=config["mode"],
+            stats=stats,
+            trace="none",
+            deadline=deadline,
+        )
+    except Exception as error:  # una configuración rota no para la carrera
+        results.put((index, None, {"status": f"error: {error}"}))
+        return
+    results.put((index, solution, stats.as_dict()))
+
+
+def _uses_macros(level, config):
+    """True si la configuración busca con los macro-movimientos del nivel."""
+    return (level.macros is not None and config["mode"] == "pushes"
+            and config["algorithm"] != "bidirectional")
+
+
+def portfolio(initial_state, configs=DEFAULT_PORTFOLIO, stats=None, deadline=None, cancel=None):
+    """
+    Ejecuta las configuraciones en paralelo sobre initial_state.
+    Devuelve (camino, ganador, resultados):
+    - camino: solución del primer proceso que resolvió, o None
+    - ganador: nombre "algoritmo:heurística:modo" del ganador, o None
+    - resultados: nombre -> status de cada configuración ("lost" si se
+      terminó al ganar otra)
+    Si se pasa stats se rellena con los contadores del ganador. deadline y
+    cancel funcionan como en search.bfs; status queda "solved",
+    "exhausted", "timeout" o "cancelled".
+    """
+    if stats is None:
+        stats = SearchStats()
+    configs = [parse_config(text) if isinstance(text, str) else text for text in configs]
+    names = [config_name(config) for config in configs]
+    time_limit = max(deadline - time.monotonic(), 0) if deadline is not None else None
+
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    level = initial_state.level
+    # los detectores no se envían a los procesos: se reconstruyen con las mismas opciones
+    options = {"deadlocks": level.deadlock is not None, "macros": level.macros is not None}
+    workers = [
+        context.Process(target=_run_config, daemon=True,
+                        args=(i, level.rows, options, initial_state.pos, initial_state.box_bits,
+                              config, time_limit, results))
+        for i, config in enumerate(configs)
+    ]
+    for worker in workers:
+        worker.start()
+
+    statuses = {}
+    solution = winner = None
+    stats.status = "exhausted"
+    try:
+        while len(statuses) < len(workers):
+            if cancel is not None and cancel.is_set():
+                stats.status = "cancelled"
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                stats.status = "timeout"
+                break
+            try:
+                index, path, result = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers) and results.empty():
+                    break  # un proceso murió sin responder (p. ej. sin memoria)
+                continue
+
+            statuses[names[index]] = result["status"]
+            # "exhausted" de un algoritmo completo también cierra la carrera;
+            # con macro-movimientos en modo empujes no prueba que no haya solución
+            conclusive = result["status"] == "solved" or (
+                result["status"] == "exhausted" and not _uses_macros(level, configs[index]))
+            if conclusive:
+                solution, winner = path, names[index]
+                for name in ("expanded", "generated", "pushes", "pops", "bound"):
+                    setattr(stats, name, result.get(name, 0))
+                stats.status = result["status"]
+                break
+            if result["status"] == "timeout":
+                stats.status = "timeout"
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+        results.close()
+
+    for name in names:
+        statuses.setdefault(name, "lost" if winner else stats.status)
+    return solution, winner, statuses
+
+
+# ============================================================
+# Aceleración frente a A* en un solo proceso
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Portafolio paralelo vs A* en un proceso")
+    parser.add_argument("--file", default="levels.json", help="archivo de niveles")
+    parser.add_argument("--levels", default="0-20", help='niveles a comparar, p. ej. "0-5,9"')
+    parser.add_argument("--configs", default=",".join(DEFAULT_PORTFOLIO),
+                        help='configuraciones "algoritmo:heurística:modo" separadas por comas')
+    parser.add_argument("--baseline", default="a_star:matching:steps",
+                        help="configuración de referencia en un solo proceso")
+    parser.add_argument("--time-limit", type=float, default=60.0, help="segundos por nivel")
+    args = parser.parse_args(argv)
+
+    levels = load_levels(args.file)
+    try:
+        selection = parse_selection(args.levels, len(levels))
+        configs = [parse_config(text) for text in args.configs.split(",") if text.strip()]
+        baseline = parse_config(args.baseline)
+    except ValueError as error:
+        raise SystemExit(str(error))
+
+    speedups = []
+    for index in selection:
+        stats = SearchStats()
+        start = time.perf_counter()
+        solve(baseline["algorithm"], parse_level(levels[index]),
+              heuristic=baseline["heuristic"], mode=baseline["mode"], stats=stats, trace="none",
+              deadline=time.monotonic() + args.time_limit)
+        single = time.perf_counter() - start
+        single_status = stats.status
+
+        stats = SearchStats()
+        start = time.perf_counter()
+        _, winner, _ = portfolio(parse_level(levels[index]), configs, stats=stats,
+                                 deadline=time.monotonic() + args.time_limit)
+        parallel = time.perf_counter() - start
+
+        # solo cuenta la aceleración si el de referencia terminó
+        speedup = single / parallel if single_status == "solved" and parallel > 0 else None
+        if speedup:
+            speedups.append(speedup)
+        line = (f"level-{index:<4d} single {single_status:9s} {single:8.3f}s   "
+                f"portfolio {stats.status:9s} {parallel:8.3f}s  ganador={winner}")
+        if speedup:
+            line += f"  x{speedup:.2f}"
+        print(line, flush=True)
+
+    if speedups:
+        product = 1.0
+        for speedup in speedups:
+            product *= speedup
+        print(f"Aceleración media geométrica: x{product ** (1 / len(speedups)):.2f} "
+              f"({len(speedups)} niveles)")
+
+
+if __name__ == "__main__":
+    main()
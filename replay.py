@@ -0,0 +1,155 @@
+"""
+Reproducción y verificación de soluciones sobre la representación compacta.
+
+Una solución es una cadena (o lista) de movimientos en notación LURD:
+- "UDLR" en mayúsculas sin distinguir empujes (lo que devuelven los
+  algoritmos de search y guardan la caché y batch)
+- LURD anotada: minúsculas para moverse y mayúsculas para empujar (formato
+  de las colecciones públicas). Si la solución tiene alguna minúscula se
+  trata como anotada y se comprueba que cada mayúscula empuja una caja y
+  cada minúscula no.
+
+Cada movimiento se aplica con las tablas de vecinos de Level (una
+consulta por paso, sin crear State): comprueba paredes, que detrás de una
+caja empujada haya suelo libre y, al final, que todas las cajas estén en
+metas.
+
+    steps = replay_steps(state.level, state.pos, state.box_bits, "RRuL")
+    valid, reason, pushes = verify(state.level, state.pos, state.box_bits, solution)
+
+    python replay.py --file levels.json resultados.jsonl
+"""
+import argparse
+import json
+import sys
+
+from level import DIRECTIONS
+from utils import load_levels, parse_level
+
+# Movimiento -> (dirección, empuje según la anotación LURD)
+MOVES = {move: (d, True) for d, move in enumerate(DIRECTIONS)}
+MOVES.update((move.lower(), (d, False)) for d, move in enumerate(DIRECTIONS))
+
+
+class ReplayError(ValueError):
+    """Movimiento ilegal en una solución; step es su índice (desde 0)."""
+
+    def __init__(self, step, move, reason):
+        super().__init__(f"Movimiento {step} ({move!r}): {reason}")
+        self.step = step
+        self.move = move
+        self.reason = reason
+
+
+# ============================================================
+# Reproducción
+# ============================================================
+def iter_replay(level, pos, box_bits, moves):
+    """
+    Aplica moves desde (pos, box_bits) y genera, por cada movimiento,
+    (jugador, desde, hasta): la celda del jugador tras moverse y la caja
+    empujada (desde -> hasta), o (-1, -1) si no empujó. Lanza ReplayError
+    en el primer movimiento ilegal.
+    """
+    neighbors = level.neighbors
+    annotated = any(move.islower() for move in moves)
+    for step, move in enumerate(moves):
+        entry = MOVES.get(move)
+        if entry is None:
+            raise ReplayError(step, move, "símbolo desconocido")
+        d, push = entry
+        nxt = neighbors[d][pos]
+        if nxt < 0:
+            raise ReplayError(step, move, "choca con una pared")
+
+        if box_bits >> nxt & 1:
+            target = neighbors[d][nxt]
+            if target < 0 or box_bits >> target & 1:
+                raise ReplayError(step, move, "la caja no se puede empujar")
+            if annotated and not push:
+                raise ReplayError(step, move, "empuja una caja pero está anotado como paso")
+            box_bits ^= (1 << nxt) | (1 << target)
+            yield nxt, nxt, target
+        else:
+            if annotated and push:
+                raise ReplayError(step, move, "anotado como empuje pero no hay caja")
+            yield nxt, -1, -1
+        pos = nxt
+
+
+def replay_steps(level, pos, box_bits, moves):
+    """Lista de (jugador, desde, hasta) de toda la solución (ver iter_replay)."""
+    return list(iter_replay(level, pos, box_bits, moves))
+
+
+def verify(level, pos, box_bits, moves):
+    """
+    Comprueba en una pasada que moves resuelve el nivel desde (pos, box_bits).
+    Devuelve (válida, motivo, empujes); motivo es None si es válida.
+    """
+    pushes = 0
+    try:
+        for pos, origin, target in iter_replay(level, pos, box_bits, moves):
+            if origin >= 0:
+                box_bits ^= (1 << origin) | (1 << target)
+                pushes += 1
+    except ReplayError as error:
+        return False, str(error), pushes
+    if box_bits != level.goals:
+        return False, "no todas las cajas terminan en una meta", pushes
+    return True, None, pushes
+
+
+def verify_state(state, moves):
+    """verify desde un State (p. ej. el de utils.parse_level)."""
+    return verify(state.level, state.pos, state.box_bits, moves)
+
+
+# ============================================================
+# Verificación por lotes (salida de batch.py)
+# ============================================================
+def verify_results(levels, lines):
+    """
+    Verifica las soluciones de líneas JSON con "level" y "solution" (la
+    salida de batch.py) contra la colección levels. Genera
+    (resultado, válida, motivo); las líneas sin solución se omiten.
+    """
+    states = {}  # nivel -> State inicial (se reutiliza entre algoritmos)
+    for line in lines:
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        if not result.get("solution"):
+            continue
+        index = result["level"]
+        if index not in states:
+            states[index] = parse_level(levels[index])
+        valid, reason, _ = verify_state(states[index], result["solution"])
+        yield result, valid, reason
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica soluciones de batch.py (JSON lines)")
+    parser.add_argument("results", nargs="?", default="-", help="archivo de resultados (por defecto stdin)")
+    parser.add_argument("--file", default="levels.json", help="archivo de niveles")
+    args = parser.parse_args(argv)
+
+    levels = load_levels(args.file)
+    source = sys.stdin if args.results == "-" else open(args.results)
+    checked = invalid = 0
+    try:
+        for result, valid, reason in verify_results(levels, source):
+            checked += 1
+            if not valid:
+                invalid += 1
+                print(f"level-{result['level']} {result.get('algorithm')}: {reason}")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"{checked} soluciones verificadas, {invalid} inválidas")
+    if invalid:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
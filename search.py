@@ -1,71 +1,827 @@
+from array import array
 from collections import deque
 import heapq
+import importlib
 import itertools
+from functools import partial
+from operator import itemgetter
+import time
+from level import DIRECTIONS, Level, iter_cells
+from state import State
+from tracing import DEFAULT_TRACE, make_trace
+
+# Modelos de sucesores: un paso del jugador o un empuje de caja (macro-movimiento)
+EXPANDERS = {
+    "steps": State.expand,
+    "pushes": State.expand_pushes,
+}
+
+# Lo mismo sobre (pos, box_bits) para el modo compacto
+SUCCESSORS = {
+    "steps": Level.step_successors,
+    "pushes": Level.push_successors,
+}
+
+# Marca en best_g de un estado ya expandido (conjunto cerrado)
+CLOSED = -1
+
+# Cada cuántas extracciones se consulta el reloj si hay límite de tiempo
+CHECK_EVERY = 128
+
+
+class SearchStats:
+    """
+    Contadores de una búsqueda (se rellenan si se pasa stats=SearchStats()).
+    - pushes / pops: entradas insertadas y sacadas de la frontera
+    - stale_pops: entradas obsoletas descartadas al sacarlas (borrado perezoso)
+    - expanded: estados expandidos
+    - generated: sucesores generados
+    - status: "solved", "exhausted" (sin solución), "timeout" o "cancelled"
+    - bound: cota inferior probada del costo óptimo (último f revisado en
+      _checkpoint; con heurísticas admisibles la f mínima de la frontera
+      nunca supera el óptimo). Queda en 0 con macro-movimientos, ver
+      proves_bound
+    - iterations / thresholds: iteraciones y umbral de cada una (ida_star)
+    """
+    __slots__ = ("pushes", "pops", "stale_pops", "expanded", "generated", "status", "bound",
+                 "iterations", "thresholds")
+
+    def __init__(self):
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.expanded = 0
+        self.generated = 0
+        self.status = None
+        self.bound = 0
+        self.iterations = 0
+        self.thresholds = []
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def proves_bound(initial_state, mode):
+    """
+    True si el f de la búsqueda acota el costo óptimo. Con macro-movimientos
+    (analysis.py) un paso del modo empujes vale varios empujes y cuenta uno,
+    así que ni f ni los umbrales de IDA* son una cota de los empujes reales.
+    """
+    return not (mode == "pushes" and initial_state.level.macros is not None)
+
+
+def _checkpoint(stats, deadline, cancel, progress, frontier_size, f, bounded=True):
+    """
+    Control periódico de la búsqueda (cada CHECK_EVERY extracciones):
+    informa el progreso y devuelve True si hay que parar por cancelación
+    o por límite de tiempo. Con bounded, f se guarda como stats.bound.
+    """
+    if bounded and f is not None and f > stats.bound:
+        stats.bound = f
+    if progress is not None:
+        progress(stats, frontier_size, f)
+    if cancel is not None and cancel.is_set():
+        stats.status = "cancelled"
+        return True
+    if deadline is not None and time.monotonic() > deadline:
+        stats.status = "timeout"
+        return True
+    return False
+
 
 # ============================================================
 # BFS - Búsqueda en anchura (no informada)
 # ============================================================
-def bfs(initial_state):
-    """Implementación de BFS: encuentra la ruta más corta en número de pasos."""
+def bfs(initial_state, mode="steps", stats=None, trace=DEFAULT_TRACE, compact=False,
+        deadline=None, cancel=None, progress=None, profile=None, hooks=None):
+    """
+    Implementación de BFS: encuentra la ruta más corta en número de pasos
+    (mode="steps") o en número de empujes (mode="pushes").
+    Devuelve (camino, explorados), donde explorados es la traza acotada
+    (ver tracing.make_trace: "none", "first(N)", "sampled(N)", "ring-buffer(N)").
+    Con compact=True usa una PredecessorTable en lugar de objetos State.
+    Control (se revisa cada CHECK_EVERY extracciones):
+    - deadline: valor de time.monotonic; al superarlo status = "timeout"
+    - cancel: objeto con is_set() (p. ej. threading.Event); status = "cancelled"
+    - progress: callback progress(stats, tamaño_frontera, f) para informar avance
+    Con profile=instrument.Profile() la búsqueda se cronometra por fases
+    (ver instrument.py); sin él no hay ningún costo extra. hooks es un dict
+    que sustituye funciones calientes del bucle solo en esta búsqueda
+    ("expand", y "heappush" / "heappop" en a_star); lo usa Profile.
+    """
+    if profile is not None:
+        return profile.run(bfs, initial_state, mode=mode, stats=stats, trace=trace, compact=compact,
+                           deadline=deadline, cancel=cancel, progress=progress)
+    if stats is None:
+        stats = SearchStats()
+    trace = make_trace(trace)
+    control = (deadline, cancel, progress)
+    watch = control != (None, None, None)
+    if compact:
+        return _bfs_compact(initial_state, mode, stats, trace, control)
+    record = trace.record if trace.active else None
+    expand = EXPANDERS[mode]
+    if hooks:
+        expand = hooks.get("expand", expand)
+    bounded = proves_bound(initial_state, mode)
     frontier = deque([initial_state])
     visited = set([initial_state])
-    explored = []
-    
+    stats.pushes += 1
+
     while frontier:
         state = frontier.popleft()
-        explored.append(state)
+        stats.pops += 1
+        if watch and stats.pops % CHECK_EVERY == 0 and \
+                _checkpoint(stats, *control, len(frontier), state.cost, bounded):
+            return None, trace.records()
+        if record:
+            record(state)
 
         if state.is_goal():
-            return state.get_solution_path(), explored
+            stats.status = "solved"
+            return state.get_solution_path(), trace.records()
 
-        for neighbor in state.expand():
+        stats.expanded += 1
+        for neighbor in expand(state):
+            stats.generated += 1
             if neighbor not in visited:
                 visited.add(neighbor)
                 frontier.append(neighbor)
-    
-    return None, explored
+                stats.pushes += 1
+
+    stats.status = "exhausted"
+    return None, trace.records()
 
 
 # ============================================================
 # A* - Algoritmo informado
 # ============================================================
-def a_star(initial_state, heuristic):
+def a_star(initial_state, heuristic, mode="steps", stats=None, trace=DEFAULT_TRACE, compact=False,
+           deadline=None, cancel=None, progress=None, profile=None, hooks=None):
     """
     A*: f(n) = g(n) + h(n)
-    - g(n): costo desde el inicio
-    - h(n): heurística (estimación a la meta)
+    - g(n): costo desde el inicio (pasos, o empujes si mode="pushes")
+    - h(n): heurística (estimación a la meta), función o nombre en HEURISTICS
+
+    best_g guarda el mejor g conocido de cada estado y hace también de
+    conjunto cerrado (CLOSED). Un estado solo entra en la frontera si mejora
+    su g; las entradas que quedan obsoletas se descartan al sacarlas
+    (borrado perezoso en lugar de decrease-key). A igual f se prefiere el
+    menor h. Las heurísticas son consistentes, así que un estado cerrado
+    nunca se reabre; con macro-movimientos (modo empujes) dejan de serlo,
+    porque un paso puede valer varios empujes, y la solución puede no ser
+    óptima aunque la búsqueda siga siendo completa. La traza, compact, el control (deadline, cancel,
+    progress), profile y hooks funcionan igual que en bfs.
     """
+    if profile is not None:
+        return profile.run(a_star, initial_state, heuristic, mode=mode, stats=stats, trace=trace,
+                           compact=compact, deadline=deadline, cancel=cancel, progress=progress)
+    heuristic = get_heuristic(heuristic)
+    if stats is None:
+        stats = SearchStats()
+    trace = make_trace(trace)
+    control = (deadline, cancel, progress)
+    watch = control != (None, None, None)
+    if compact:
+        return _a_star_compact(initial_state, heuristic, mode, stats, trace, control, hooks)
+    record = trace.record if trace.active else None
+    expand = EXPANDERS[mode]
+    heappush, heappop = heapq.heappush, heapq.heappop
+    if hooks:
+        expand = hooks.get("expand", expand)
+        heappush, heappop = hooks.get("heappush", heappush), hooks.get("heappop", heappop)
+
     frontier = []
-    counter = itertools.count()  # contador incremental único
+    counter = itertools.count()  # desempate estable tras (f, h)
     h0 = heuristic(initial_state)
-    heapq.heappush(frontier, (h0, next(counter), initial_state))
-    visited = set()
-    explored = []
+    heappush(frontier, (h0, h0, next(counter), initial_state))
+    best_g = {initial_state: 0}
+    bounded = proves_bound(initial_state, mode)
+    stats.pushes += 1
 
     while frontier:
-        f, _, state = heapq.heappop(frontier)
-        explored.append(state)
+        f, _, _, state = heappop(frontier)
+        stats.pops += 1
+        if watch and stats.pops % CHECK_EVERY == 0 and \
+                _checkpoint(stats, *control, len(frontier), f, bounded):
+            return None, trace.records()
+
+        # Entrada obsoleta: ya cerrado o existe un camino mejor
+        if best_g[state] != state.cost:
+            stats.stale_pops += 1
+            continue
+
+        best_g[state] = CLOSED
+        if record:
+            record(state)
 
         if state.is_goal():
-            return state.get_solution_path(), explored
+            stats.status = "solved"
+            return state.get_solution_path(), trace.records()
 
-        visited.add(state)
+        stats.expanded += 1
+        for neighbor in expand(state):
+            stats.generated += 1
+            g = neighbor.cost
+            known = best_g.get(neighbor)
+            # CLOSED (-1) también descarta al vecino
+            if known is not None and known <= g:
+                continue
+            best_g[neighbor] = g
+            h = heuristic(neighbor)
+            heappush(frontier, (g + h, h, next(counter), neighbor))
+            stats.pushes += 1
 
-        for neighbor in state.expand():
-            if neighbor not in visited:
-                g = neighbor.cost
+    stats.status = "exhausted"
+    return None, trace.records()
+
+
+# ============================================================
+# IDA* - A* con profundización iterativa (memoria acotada)
+# ============================================================
+def ida_star(initial_state, heuristic, mode="steps", stats=None, trace=DEFAULT_TRACE, compact=False,
+             deadline=None, cancel=None, progress=None, table_size=0):
+    """
+    IDA*: búsqueda en profundidad acotada por f = g + h; cada iteración sube
+    el umbral al menor f que lo superó en la anterior. Solo guarda el camino
+    actual y los hijos pendientes de cada nivel, así que la memoria crece con
+    la profundidad y no con los estados visitados (compact no cambia nada).
+
+    - heuristic: función o nombre en HEURISTICS (debe ser admisible)
+    - table_size: si es > 0, tabla de transposición de tamaño fijo indexada
+      por hash. Cada casilla guarda (clave, g, iteración) y siempre se
+      reemplaza; un estado ya visto en la misma iteración con g menor o igual
+      no se vuelve a expandir.
+    - stats.iterations / stats.thresholds: iteraciones hechas y umbral de
+      cada una. Si stats.bound trae una cota previa (p. ej. de la caché), el
+      primer umbral empieza en ella (salvo con macro-movimientos, ver
+      proves_bound).
+    La traza y el control (deadline, cancel, progress) funcionan igual que
+    en bfs; progress recibe la profundidad actual y el umbral.
+    """
+    heuristic = get_heuristic(heuristic)
+    if stats is None:
+        stats = SearchStats()
+    trace = make_trace(trace)
+    control = (deadline, cancel, progress)
+    watch = control != (None, None, None)
+    record = trace.record if trace.active else None
+    expand = EXPANDERS[mode]
+    by_f = itemgetter(0, 1)
+
+    level = initial_state.level
+    shift = (level.width * level.height).bit_length()
+    if table_size:
+        table_keys = [-1] * table_size
+        table_g = array("i", [0]) * table_size
+        table_iteration = array("i", [0]) * table_size
+
+    bounded = proves_bound(initial_state, mode)
+    threshold = max(heuristic(initial_state), stats.bound if bounded else 0)
+    stats.pushes += 1
+    while threshold < UNREACHABLE:
+        stats.iterations += 1
+        stats.thresholds.append(threshold)
+        if bounded:
+            stats.bound = threshold
+        iteration = stats.iterations
+        next_threshold = UNREACHABLE
+
+        # pending[i]: hijos sin visitar del estado path[i], ordenados de
+        # mayor a menor (f, h) para sacar siempre el más prometedor
+        path = []
+        on_path = set()
+        pending = [[(threshold, 0, initial_state)]]
+        while pending:
+            children = pending[-1]
+            if not children:
+                pending.pop()
+                if path:
+                    on_path.discard(path.pop())
+                continue
+
+            f, _, state = children.pop()
+            stats.pops += 1
+            if watch and stats.pops % CHECK_EVERY == 0 and \
+                    _checkpoint(stats, *control, len(path), threshold, bounded):
+                return None, trace.records()
+            if f > threshold:
+                # el resto de hermanos tiene f mayor o igual
+                next_threshold = min(next_threshold, f)
+                children.clear()
+                continue
+            if state in on_path:
+                continue
+
+            if table_size:
+                key = state.box_bits << shift | state.pos
+                slot = hash(key) % table_size
+                if table_keys[slot] == key and table_iteration[slot] == iteration \
+                        and table_g[slot] <= state.cost:
+                    stats.stale_pops += 1
+                    continue
+                table_keys[slot] = key
+                table_g[slot] = state.cost
+                table_iteration[slot] = iteration
+
+            if record:
+                record(state)
+            if state.is_goal():
+                stats.status = "solved"
+                return state.get_solution_path(), trace.records()
+
+            stats.expanded += 1
+            successors = []
+            for neighbor in expand(state):
                 h = heuristic(neighbor)
-                f = g + h
-                heapq.heappush(frontier, (f, next(counter), neighbor))
+                successors.append((neighbor.cost + h, h, neighbor))
+            successors.sort(key=by_f, reverse=True)
+            stats.generated += len(successors)
+            stats.pushes += len(successors)
+            path.append(state)
+            on_path.add(state)
+            pending.append(successors)
+
+        threshold = next_threshold
+
+    stats.status = "exhausted"
+    return None, trace.records()
+
+
+# ============================================================
+# Búsqueda bidireccional: empujes desde el inicio, tirones desde la meta
+# ============================================================
+FORWARD, BACKWARD = 0, 1
+
+
+def bidirectional(initial_state, mode="pushes", stats=None, trace=DEFAULT_TRACE, compact=False,
+                  deadline=None, cancel=None, progress=None):
+    """
+    BFS bidireccional en modo empujes. Hacia adelante se empujan cajas desde
+    el estado inicial; hacia atrás se tiran desde las configuraciones meta
+    (todas las cajas en metas, el jugador en cada región libre). Los tirones
+    nunca llevan una caja a una casilla muerta, así que la parte inversa no
+    genera esas posiciones.
 
-    return None, explored
+    Los estados son claves enteras (cajas << shift | jugador canónico) en una
+    tabla compartida clave -> (lado, clave vecina, empuje, profundidad):
+    - FORWARD: se llegó desde la clave vecina con ese empuje
+    - BACKWARD: desde este estado, ese empuje lleva a la clave vecina
+    Cada vez se expande una capa completa del lado con la frontera más
+    pequeña; si la capa toca estados del otro lado se devuelve el encuentro
+    más corto, que es óptimo en empujes.
 
+    Solo admite mode="pushes"; compact no cambia nada (ya usa claves
+    enteras). La traza y el control funcionan igual que en bfs.
+    """
+    if mode != "pushes":
+        raise ValueError("bidirectional solo admite mode='pushes'")
+    if stats is None:
+        stats = SearchStats()
+    trace = make_trace(trace)
+    control = (deadline, cancel, progress)
+    watch = control != (None, None, None)
+    record = trace.record if trace.active else None
+
+    level = initial_state.level
+    shift = (level.width * level.height).bit_length()
+    mask = (1 << shift) - 1
+    # los tirones no tienen macro-movimientos: hacia adelante tampoco
+    expanders = (partial(level.push_successors, macros=False), level.pull_successors)
+
+    root_pos = min(level.reachable(initial_state.pos, initial_state.box_bits))
+    root = initial_state.box_bits << shift | root_pos
+    seen = {root: (FORWARD, -1, 0, 0)}
+    layers = [[root], []]
+    for pos in level.goal_starts():
+        key = level.goals << shift | pos
+        if key == root:
+            stats.status = "solved"
+            return [], trace.records()
+        seen[key] = (BACKWARD, -1, 0, 0)
+        layers[BACKWARD].append(key)
+    depths = [0, 0]
+    stats.pushes += len(layers[FORWARD]) + len(layers[BACKWARD])
+
+    while layers[FORWARD] and layers[BACKWARD]:
+        side = FORWARD if len(layers[FORWARD]) <= len(layers[BACKWARD]) else BACKWARD
+        successors = expanders[side]
+        depth = depths[side] + 1
+        best = None  # (longitud, clave adelante, empuje, clave atrás)
+        next_layer = []
+
+        for key in layers[side]:
+            stats.pops += 1
+            if watch and stats.pops % CHECK_EVERY == 0 and \
+                    _checkpoint(stats, *control, len(layers[FORWARD]) + len(layers[BACKWARD]),
+                                depths[FORWARD] + depths[BACKWARD]):
+                return None, trace.records()
+            pos, box_bits = key & mask, key >> shift
+            if record:
+                record(State(level, pos, box_bits, cost=depths[side]))
+
+            stats.expanded += 1
+            for code, new_pos, new_boxes in successors(pos, box_bits):
+                stats.generated += 1
+                new_key = new_boxes << shift | new_pos
+                entry = seen.get(new_key)
+                if entry is None:
+                    seen[new_key] = (side, key, code, depth)
+                    next_layer.append(new_key)
+                    stats.pushes += 1
+                elif entry[0] != side:
+                    # encuentro con el otro lado
+                    length = depth + entry[3]
+                    if best is None or length < best[0]:
+                        if side == FORWARD:
+                            best = (length, key, code, new_key)
+                        else:
+                            best = (length, new_key, code, key)
+
+        depths[side] = depth
+        layers[side] = next_layer
+        if best is not None:
+            stats.status = "solved"
+            return _meeting_path(initial_state, seen, *best[1:]), trace.records()
+
+    stats.status = "exhausted"
+    return None, trace.records()
+
+
+def _meeting_path(initial_state, seen, forward_key, code, backward_key):
+    """Une las dos mitades (raíz -> encuentro -> meta) en el camino paso a paso."""
+    codes = []
+    key = forward_key
+    while seen[key][1] >= 0:
+        _, key, move, _ = seen[key]
+        codes.append(move)
+    codes.reverse()
+    codes.append(code)
+    key = backward_key
+    while seen[key][1] >= 0:
+        _, key, move, _ = seen[key]
+        codes.append(move)
+    return initial_state.level.push_path(initial_state.pos, initial_state.box_bits, codes, macros=False)
+
+
+# ============================================================
+# Modo compacto: tabla de predecesores en arrays
+# ============================================================
+class PredecessorTable:
+    """
+    Tabla compacta de estados: id → (id del padre, código de movimiento).
+
+    Cada estado se identifica con una clave entera que empaqueta cajas y
+    jugador (box_bits << shift | pos). La frontera guarda solo ids y el
+    camino se reconstruye desde la tabla al llegar a la meta, sin cadenas
+    de objetos State ni referencias a padres. El movimiento ocupa un byte
+    (la dirección) en modo pasos y 4 bytes (celda * 4 + d) en modo empujes.
+    """
+
+    def __init__(self, level, mode):
+        self.level = level
+        self.mode = mode
+        self.shift = (level.width * level.height).bit_length()
+        self.mask = (1 << self.shift) - 1
+        self.keys = []             # id -> clave
+        self.parents = array("i")  # id -> id del padre (-1 en la raíz)
+        self.moves = bytearray() if mode == "steps" else array("i")
+
+    def key(self, pos, box_bits):
+        return box_bits << self.shift | pos
+
+    def unpack(self, state_id):
+        """id -> (pos, box_bits)."""
+        key = self.keys[state_id]
+        return key & self.mask, key >> self.shift
+
+    def add(self, key, parent, move):
+        self.keys.append(key)
+        self.parents.append(parent)
+        self.moves.append(move)
+        return len(self.keys) - 1
+
+    def path(self, state_id):
+        """Reconstruye el camino paso a paso hasta state_id."""
+        codes = []
+        while self.parents[state_id] >= 0:
+            codes.append(self.moves[state_id])
+            state_id = self.parents[state_id]
+        codes.reverse()
+
+        if self.mode == "pushes":
+            pos, box_bits = self.unpack(state_id)
+            return self.level.push_path(pos, box_bits, codes)
+        return [DIRECTIONS[code] for code in codes]
+
+
+def _bfs_compact(initial_state, mode, stats, trace, control):
+    """
+    BFS sobre una PredecessorTable (ver bfs). Los ids se asignan en orden de
+    descubrimiento, así que la frontera es simplemente el rango de ids
+    [state_id, len(table.keys)) y no necesita cola propia.
+    """
+    level = initial_state.level
+    successors = SUCCESSORS[mode]
+    record = trace.record if trace.active else None
+    watch = control != (None, None, None)
+    table = PredecessorTable(level, mode)
+    root_key = table.key(initial_state.pos, initial_state.box_bits)
+    visited = {root_key}
+    table.add(root_key, -1, 0)
+    stats.pushes += 1
+
+    state_id = -1
+    while state_id + 1 < len(table.keys):
+        state_id += 1
+        stats.pops += 1
+        if watch and stats.pops % CHECK_EVERY == 0 and \
+                _checkpoint(stats, *control, len(table.keys) - state_id, None):
+            return None, trace.records()
+        pos, box_bits = table.unpack(state_id)
+        if record:
+            record(State(level, pos, box_bits))
+
+        if box_bits == level.goals:
+            stats.status = "solved"
+            return table.path(state_id), trace.records()
+
+        stats.expanded += 1
+        for code, new_pos, new_boxes in successors(level, pos, box_bits):
+            stats.generated += 1
+            key = table.key(new_pos, new_boxes)
+            if key not in visited:
+                visited.add(key)
+                table.add(key, state_id, code)
+                stats.pushes += 1
+
+    stats.status = "exhausted"
+    return None, trace.records()
+
+
+def _a_star_compact(initial_state, heuristic, mode, stats, trace, control, hooks=None):
+    """
+    A* sobre una PredecessorTable (ver a_star). best_g va de clave a g y
+    las entradas del heap son (f, h, id): g = f - h se compara con best_g
+    para descartar las obsoletas. Si un estado mejora su g se añade una
+    fila nueva a la tabla. La heurística recibe un State temporal que no
+    se guarda.
+    """
+    level = initial_state.level
+    successors = SUCCESSORS[mode]
+    record = trace.record if trace.active else None
+    watch = control != (None, None, None)
+    heappush, heappop = heapq.heappush, heapq.heappop
+    if hooks:
+        heappush, heappop = hooks.get("heappush", heappush), hooks.get("heappop", heappop)
+    table = PredecessorTable(level, mode)
+
+    root_key = table.key(initial_state.pos, initial_state.box_bits)
+    best_g = {root_key: 0}
+    h0 = heuristic(State(level, initial_state.pos, initial_state.box_bits))
+    frontier = [(h0, h0, table.add(root_key, -1, 0))]
+    bounded = proves_bound(initial_state, mode)
+    stats.pushes += 1
+
+    while frontier:
+        f, h, state_id = heappop(frontier)
+        stats.pops += 1
+        if watch and stats.pops % CHECK_EVERY == 0 and \
+                _checkpoint(stats, *control, len(frontier), f, bounded):
+            return None, trace.records()
+        g = f - h
+        key = table.keys[state_id]
+
+        # Entrada obsoleta: ya cerrado o existe un camino mejor
+        if best_g[key] != g:
+            stats.stale_pops += 1
+            continue
+
+        best_g[key] = CLOSED
+        pos, box_bits = table.unpack(state_id)
+        parent = State(level, pos, box_bits, cost=g)
+        if record:
+            record(parent)
+
+        if box_bits == level.goals:
+            stats.status = "solved"
+            return table.path(state_id), trace.records()
+
+        stats.expanded += 1
+        g += 1
+        for code, new_pos, new_boxes in successors(level, pos, box_bits):
+            stats.generated += 1
+            key = table.key(new_pos, new_boxes)
+            known = best_g.get(key)
+            # CLOSED (-1) también descarta al vecino
+            if known is not None and known <= g:
+                continue
+            best_g[key] = g
+            h = heuristic(State(level, new_pos, new_boxes, parent=parent, cost=g))
+            heappush(frontier, (g + h, h, table.add(key, state_id, code)))
+            stats.pushes += 1
+
+    stats.status = "exhausted"
+    return None, trace.records()
 
 
 def heuristic(state):
     """Heurística: suma de distancias Manhattan de cada caja a la meta más cercana."""
+    level = state.level
+    goals = [level.coords(goal) for goal in level.goal_cells]
     total = 0
-    for box in state.boxes:
-        dist = min(abs(box[0] - goal[0]) + abs(box[1] - goal[1]) for goal in state.goals)
+    for cell in iter_cells(state.box_bits):
+        box = level.coords(cell)
+        dist = min(abs(box[0] - goal[0]) + abs(box[1] - goal[1]) for goal in goals)
         total += dist
     return total
+
+
+# ============================================================
+# Heurística de emparejamiento caja→meta (admisible)
+# ============================================================
+UNREACHABLE = 1 << 20  # costo de una caja que no puede llegar a una meta
+
+
+def _assign_row(cost, u, v, p, i, m):
+    """
+    Inserta la fila libre i en el emparejamiento (método húngaro, una fase).
+    Requiere potenciales factibles: cost[r][j] - u[r] - v[j] >= 0.
+    Índices desde 1; p[j] = fila asignada a la columna j (0 = libre).
+    """
+    minv = [UNREACHABLE * 4] * (m + 1)
+    used = [False] * (m + 1)
+    way = [0] * (m + 1)
+    p[0] = i
+    j0 = 0
+    while True:
+        used[j0] = True
+        i0 = p[j0]
+        row = cost[i0]
+        ui0 = u[i0]
+        delta = UNREACHABLE * 4
+        j1 = 0
+        for j in range(1, m + 1):
+            if not used[j]:
+                cur = row[j] - ui0 - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+        for j in range(m + 1):
+            if used[j]:
+                u[p[j]] += delta
+                v[j] -= delta
+            else:
+                minv[j] -= delta
+        j0 = j1
+        if p[j0] == 0:
+            break
+    # Invertir el camino aumentante
+    while j0:
+        j1 = way[j0]
+        p[j0] = p[j1]
+        j0 = j1
+
+
+class MatchingHeuristic:
+    """
+    Heurística: costo mínimo de asignar cada caja a una meta distinta, usando
+    las distancias de empuje reales (Level.distances) en lugar de Manhattan.
+    Es admisible para pasos y para empujes.
+
+    Guarda la solución (potenciales y asignación) de la última configuración
+    de cajas resuelta. Como A* evalúa seguidos los hijos de un mismo padre:
+    - si el hijo no movió cajas, reutiliza el valor del padre;
+    - si movió una sola caja, actualiza el emparejamiento del padre con una
+      sola fase húngara O(n²) en vez de resolverlo desde cero.
+    """
+
+    def __init__(self):
+        self._level = None
+        self._bits = None
+        self._value = 0
+
+    def __call__(self, state):
+        bits = state.box_bits
+        if state.level is not self._level:
+            self._level = state.level
+            self._bits = None
+        if bits == self._bits:
+            return self._value
+
+        parent = state.parent
+        if parent is not None:
+            moved = parent.box_bits ^ bits
+            old = parent.box_bits & moved
+            # una sola caja movida: old y new tienen un bit cada uno
+            if old and old & (old - 1) == 0 and bin(moved).count("1") == 2:
+                if parent.box_bits != self._bits:
+                    self._solve(parent.box_bits)
+                return self._update(old.bit_length() - 1, (bits & moved).bit_length() - 1)
+
+        return self._solve(bits)
+
+    def _cost_row(self, cell):
+        row = [0]
+        for dist in self._level.distances:
+            d = dist[cell]
+            row.append(d if d >= 0 else UNREACHABLE)
+        return row
+
+    def _solve(self, bits):
+        """Resuelve desde cero y guarda la solución como referencia."""
+        cells = list(iter_cells(bits))
+        n, m = len(cells), len(self._level.goal_cells)
+        cost = [None] + [self._cost_row(cell) for cell in cells]
+        u, v, p = [0] * (n + 1), [0] * (m + 1), [0] * (m + 1)
+        for i in range(1, n + 1):
+            _assign_row(cost, u, v, p, i, m)
+
+        self._bits = bits
+        self._rows = {cell: i for i, cell in enumerate(cells, 1)}
+        self._cost, self._u, self._v, self._p = cost, u, v, p
+        self._value = self._total(cost, p)
+        return self._value
+
+    def _update(self, old_cell, new_cell):
+        """Valor del hijo en el que la caja de old_cell pasó a new_cell."""
+        i = self._rows[old_cell]
+        m = len(self._p) - 1
+        cost = list(self._cost)
+        cost[i] = self._cost_row(new_cell)
+        u, v, p = self._u[:], self._v[:], self._p[:]
+
+        # liberar la fila i y restaurar la factibilidad de sus potenciales
+        p[p.index(i, 1)] = 0
+        u[i] = min(cost[i][j] - v[j] for j in range(1, m + 1))
+        _assign_row(cost, u, v, p, i, m)
+        return self._total(cost, p)
+
+    @staticmethod
+    def _total(cost, p):
+        return sum(cost[p[j]][j] for j in range(1, len(p)) if p[j])
+
+
+# Heurísticas seleccionables por nombre en a_star: nombre -> fábrica.
+# MatchingHeuristic guarda estado entre llamadas, así que cada búsqueda (o
+# cada diagrama) crea la suya con get_heuristic y no se comparte entre hilos.
+HEURISTICS = {
+    "manhattan": lambda: heuristic,
+    "matching": MatchingHeuristic,
+}
+
+
+def get_heuristic(heuristic):
+    """Función heurística lista para usar: la propia función o, si es un nombre, una nueva."""
+    if isinstance(heuristic, str):
+        return HEURISTICS[heuristic]()
+    return heuristic
+
+
+# ============================================================
+# Registro de algoritmos por nombre (batch y benchmarks)
+# ============================================================
+SOLVERS = {
+    "bfs": bfs,
+    "a_star": a_star,
+    "ida_star": ida_star,
+    "bidirectional": bidirectional,
+}
+
+# Algoritmos con dependencias opcionales: nombre -> módulo que los registra
+# en SOLVERS. Se importan la primera vez que se piden, así que importar
+# search solo carga la biblioteca estándar.
+LAZY_SOLVERS = {"a_star_batched": "batched"}
+
+# Algoritmos que reciben una heurística
+INFORMED = {"a_star", "ida_star", "a_star_batched"}
+
+
+def solver_names():
+    """Nombres de todos los algoritmos (los opcionales aún sin cargar incluidos)."""
+    return list(SOLVERS) + [name for name in LAZY_SOLVERS if name not in SOLVERS]
+
+
+def get_solver(algorithm):
+    """Función de búsqueda de un algoritmo, importando su módulo si hace falta."""
+    if algorithm not in SOLVERS and algorithm in LAZY_SOLVERS:
+        importlib.import_module(LAZY_SOLVERS[algorithm])
+    if algorithm not in SOLVERS:
+        if algorithm in LAZY_SOLVERS:
+            raise ValueError(f"Algoritmo no disponible (falta una dependencia opcional): {algorithm}")
+        raise ValueError(f"Algoritmo desconocido: {algorithm}")
+    return SOLVERS[algorithm]
+
+
+def solve(algorithm, initial_state, heuristic="manhattan", **options):
+    """
+    Ejecuta un algoritmo de SOLVERS por nombre. Las opciones (mode, stats,
+    trace, compact, deadline) se pasan tal cual al algoritmo.
+    """
+    solver = get_solver(algorithm)
+    if algorithm in INFORMED:
+        return solver(initial_state, heuristic, **options)
+    return solver(initial_state, **options)
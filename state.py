@@ -1,93 +1,94 @@
+from level import DIRECTIONS, iter_cells
+
+
 class State:
-    def __init__(self, player, boxes, goals, level, parent=None, action=None, cost=0):
+    __slots__ = ("level", "pos", "box_bits", "parent", "action", "cost", "zhash")
+
+    def __init__(self, level, pos, box_bits, parent=None, action=None, cost=0, zhash=None):
         """
-        Representa un estado del juego Sokoban.
-        - player: (x,y) posición del jugador
-        - boxes: frozenset de posiciones de cajas {(x1,y1), (x2,y2), ...}
-        - goals: frozenset de metas {(x1,y1), (x2,y2), ...}
-        - level: el mapa (lista de strings con paredes)
+        Representa un estado del juego Sokoban en forma compacta.
+        - level: objeto Level compartido (paredes y metas, una sola vez por nivel)
+        - pos: índice plano de la celda del jugador
+        - box_bits: máscara de bits con las cajas (bit i = caja en la celda i)
         - parent: referencia al estado anterior (para reconstruir camino)
         - action: movimiento que llevó a este estado ("U","D","L","R")
         - cost: costo acumulado (para A*)
+        - zhash: hash Zobrist (ver Level.zobrist); los sucesores lo heredan
+          del padre con XOR, y si falta se calcula al pedir el hash
         """
-        self.player = player
-        self.boxes = frozenset(boxes)
-        self.goals = frozenset(goals if goals is not None else [])
         self.level = level
+        self.pos = pos
+        self.box_bits = box_bits
         self.parent = parent
         self.action = action
         self.cost = cost
+        self.zhash = zhash
+
+    # ---------------------------
+    # Adaptador a coordenadas (x, y) para la GUI
+    # ---------------------------
+    @property
+    def player(self):
+        """Posición del jugador como (x, y)."""
+        return self.level.coords(self.pos)
+
+    @property
+    def boxes(self):
+        """frozenset de posiciones de cajas {(x1,y1), (x2,y2), ...}."""
+        return self.level.to_positions(self.box_bits)
+
+    @property
+    def goals(self):
+        """frozenset de metas {(x1,y1), (x2,y2), ...}."""
+        return self.level.to_positions(self.level.goals)
 
     # ---------------------------
     # Reglas del juego
     # ---------------------------
     def is_goal(self):
         """Un estado es objetivo si todas las cajas están en las metas."""
-        return self.boxes == self.goals
-    
-    def is_deadlock(self, boxes):
-        """
-        Detecta deadlocks simples:
-        - Caja contra esquina (pared arriba/izquierda, etc.)
-        - Caja contra pared en celda que no es meta
-        """
-        for (x, y) in boxes:
-            if (x, y) not in self.goals:
-                # Revisar esquinas
-                if (self.level[y-1][x] == "#" or self.level[y+1][x] == "#") and \
-                (self.level[y][x-1] == "#" or self.level[y][x+1] == "#"):
-                    return True
-        return False
+        return self.box_bits == self.level.goals
 
     def expand(self):
         """Genera los estados vecinos (jugador moviéndose arriba/abajo/izq/der)."""
-        moves = {
-            "U": (0, -1),
-            "D": (0, 1),
-            "L": (-1, 0),
-            "R": (1, 0)
-        }
-
-        neighbors = []
-        for action, (dx, dy) in moves.items():
-            new_player = (self.player[0] + dx, self.player[1] + dy)
-
-            # 1. Si choca con pared, no es válido
-            if self.level[new_player[1]][new_player[0]] == "#":
-                continue
-
-            new_boxes = set(self.boxes)
-
-            # 2. Si hay caja en la nueva posición del jugador
-            if new_player in self.boxes:
-                new_box = (new_player[0] + dx, new_player[1] + dy)
-
-                # Si detrás hay pared o caja → no se puede empujar
-                if self.level[new_box[1]][new_box[0]] == "#" or new_box in self.boxes:
-                    continue
-
-                # Mover la caja
-                new_boxes.remove(new_player)
-                new_boxes.add(new_box)
-
-                # Chequeo de deadlocks  -> por ejemplo cajas en esquinas
-                if self.is_deadlock(new_boxes):
-                    continue
-
-            # Crear nuevo estado
-            neighbors.append(
-                State(
-                    new_player,
-                    new_boxes,
-                    self.goals,
-                    self.level,
-                    parent=self,
-                    action=action,
-                    cost=self.cost + 1
-                )
-            )
-
-        return neighbors
+        level = self.level
+        cost = self.cost + 1
+        box_bits = self.box_bits
+        neighbors = level.neighbors
+        zobrist_boxes, zobrist_player = level.zobrist_boxes, level.zobrist_player
+        # hash del padre sin el jugador: cada hijo añade su celda y, si
+        # empujó, mueve la caja de new_player a la celda siguiente
+        base = hash(self) ^ zobrist_player[self.pos]
+        children = []
+        for d, new_player, new_boxes in level.step_successors(self.pos, box_bits):
+            zhash = base ^ zobrist_player[new_player]
+            if new_boxes != box_bits:
+                zhash ^= zobrist_boxes[new_player] ^ zobrist_boxes[neighbors[d][new_player]]
+            children.append(State(level, new_player, new_boxes, self, DIRECTIONS[d], cost, zhash))
+        return children
+
+    def expand_pushes(self):
+        """
+        Genera solo los estados tras empujar una caja (macro-movimientos).
+        El jugador se normaliza a la celda superior izquierda de su región
+        alcanzable, así dos estados con las mismas cajas y la misma región
+        son iguales. La acción es el código del empuje (ver
+        Level.push_successors).
+        """
+        level = self.level
+        cost = self.cost + 1
+        box_bits = self.box_bits
+        zobrist_boxes, zobrist_player = level.zobrist_boxes, level.zobrist_player
+        base = hash(self) ^ zobrist_player[self.pos]
+        children = []
+        for code, new_player, new_boxes in level.push_successors(self.pos, box_bits):
+            # con macro-movimientos la caja no acaba junto a cell: se usan
+            # las dos celdas que cambian (la de origen y la de destino)
+            zhash = base ^ zobrist_player[new_player]
+            for moved in iter_cells(box_bits ^ new_boxes):
+                zhash ^= zobrist_boxes[moved]
+            children.append(State(level, new_player, new_boxes, self, code, cost, zhash))
+        return children
 
     def get_solution_path(self):
         """Reconstruye el camino desde el estado inicial hasta aquí."""
@@ -96,17 +97,25 @@ class State:
         while state.parent is not None:
             path.append(state.action)
             state = state.parent
-        return list(reversed(path))
-    
-    
+        path.reverse()
 
+        # En modo empujes las acciones son códigos de empuje: se reconstruyen
+        # los pasos del jugador desde el estado inicial
+        if path and isinstance(path[0], int):
+            return self.level.push_path(state.pos, state.box_bits, path)
+        return path
 
     # ---------------------------
     # Necesario para sets y dicts
     # ---------------------------
     def __hash__(self):
-        return hash((self.player, self.boxes))
+        # hash Zobrist: los conjuntos y diccionarios de la búsqueda no
+        # vuelven a recorrer box_bits. Dos estados con el mismo hash se
+        # distinguen igualmente con __eq__ (verificación de colisiones).
+        zhash = self.zhash
+        if zhash is None:
+            zhash = self.zhash = self.level.zobrist(self.pos, self.box_bits)
+        return zhash
 
     def __eq__(self, other):
-        return (self.player, self.boxes) == (other.player, other.boxes)
-
+        return self.pos == other.pos and self.box_bits == other.box_bits
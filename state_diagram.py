@@ -1,72 +1,116 @@
 import tkinter as tk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
 import matplotlib.pyplot as plt
-import networkx as nx
 from collections import deque
-from search import heuristic
-
-def build_state_tree(initial_state, explored):
-    """Construye un árbol de estados a partir de los estados explorados."""
-    tree = nx.DiGraph()
-    
-    # Añadir todos los estados explorados y sus padres al árbol
-    for state in explored:
-        tree.add_node(state)
-        if state.parent is not None:
-            tree.add_edge(state.parent, state)
-            
-    # Garantizar que el estado inicial se encuentra en la raíz
-    if initial_state not in tree:
-        tree.add_node(initial_state)
-
-    return tree
-
-def hierarchical_pos(G, root, max_depth=5):
+from search import get_heuristic
+
+# Nodos dibujados por fila (profundidad); el resto se agrupa en un "+N"
+MAX_ROW = 40
+# Etiquetas como máximo a la vista; con más nodos visibles no se dibujan
+MAX_LABELS = 40
+
+BASE_COLOR = to_rgba("lightblue")
+CURRENT_COLOR = to_rgba("lightgreen")
+PARENT_COLOR = to_rgba("orange")
+GROUP_COLOR = to_rgba("lightgray")
+
+
+class StateTree:
+    """
+    Árbol de los estados explorados con índices enteros.
+    El nodo 0 es el estado inicial; los demás van en orden de exploración.
+    Los estados repetidos comparten nodo y los que no tienen padre en la
+    traza (p. ej. modo compacto o ring-buffer) quedan fuera del árbol.
+    """
+
+    def __init__(self, initial_state, explored):
+        self.states = [initial_state]
+        self.index = {(initial_state.pos, initial_state.box_bits): 0}
+        self.step_node = []  # paso de la exploración -> nodo
+
+        for state in explored:
+            key = (state.pos, state.box_bits)
+            node = self.index.get(key)
+            if node is None:
+                node = self.index[key] = len(self.states)
+                self.states.append(state)
+            self.step_node.append(node)
+
+        count = len(self.states)
+        self.parent = [-1] * count
+        self.children = [[] for _ in range(count)]
+        for node in range(1, count):
+            parent = self.states[node].parent
+            if parent is not None:
+                parent_node = self.index.get((parent.pos, parent.box_bits), -1)
+                if parent_node >= 0 and parent_node != node:
+                    self.parent[node] = parent_node
+                    self.children[parent_node].append(node)
+
+        # profundidad desde la raíz (-1: fuera del árbol)
+        self.depth = [-1] * count
+        self.depth[0] = 0
+        queue = deque([0])
+        while queue:
+            node = queue.popleft()
+            for child in self.children[node]:
+                if self.depth[child] < 0:
+                    self.depth[child] = self.depth[node] + 1
+                    queue.append(child)
+
+    def __len__(self):
+        return len(self.states)
+
+
+def layout_tree(tree, max_depth=5, max_row=MAX_ROW):
     """
-    Posición jerárquica para dibujar el árbol limitado a una profundidad.
-    Esta función es más robusta y previene KeyErrors.
+    Posición jerárquica calculada una sola vez, limitada en profundidad.
+    Cada fila dibuja como máximo max_row nodos (en orden de exploración);
+    los demás, junto con sus subárboles, se agrupan en un nodo "+N".
+    Devuelve (pos, groups, counts):
+    - pos: nodo -> (x, y) de los nodos dibujados
+    - groups: profundidad -> (x, y, nodos agrupados) de cada fila recortada
+    - counts: profundidad -> número de estados del árbol a esa profundidad
     """
-    pos = {root: (0, 0)}
-    queue = deque([(root, 0)])
-    visited = {root}
-    
-    layer_nodes = {0: [root]}
-    
+    counts = {}
+    for depth in tree.depth:
+        if 0 <= depth <= max_depth:
+            counts[depth] = counts.get(depth, 0) + 1
+
+    rows = {0: [0]}
+    queue = deque([0])
     while queue:
-        parent, depth = queue.popleft()
-        if depth >= max_depth:
+        node = queue.popleft()
+        depth = tree.depth[node] + 1
+        if depth > max_depth:
             continue
-            
-        for child in sorted(list(G.successors(parent)), key=lambda s: s.cost):
-            if child not in visited:
-                visited.add(child)
-                new_depth = depth + 1
-                if new_depth not in layer_nodes:
-                    layer_nodes[new_depth] = []
-                layer_nodes[new_depth].append(child)
-                pos[child] = (0, 0)
-                queue.append((child, new_depth))
-
-    for depth, nodes_at_depth in layer_nodes.items():
-        num_nodes = len(nodes_at_depth)
-        for i, node in enumerate(nodes_at_depth):
-            x = (i - (num_nodes - 1) / 2) * 2
-            y = -depth * 1.5
-            pos[node] = (x, y)
-    
-    limited_tree = nx.DiGraph()
-    for u, v in G.edges():
-        if u in pos and v in pos:
-            limited_tree.add_edge(u, v)
-
-    return limited_tree, pos
+        row = rows.setdefault(depth, [])
+        for child in tree.children[node]:
+            if tree.depth[child] == depth and len(row) < max_row:
+                row.append(child)
+                queue.append(child)
+
+    pos = {}
+    groups = {}
+    for depth in counts:
+        nodes = rows.get(depth, [])
+        hidden = counts.get(depth, 0) - len(nodes)
+        slots = len(nodes) + (1 if hidden else 0)
+        y = -depth * 1.5
+        for i, node in enumerate(nodes):
+            pos[node] = ((i - (slots - 1) / 2) * 2, y)
+        if hidden:
+            groups[depth] = ((slots - 1 - (slots - 1) / 2) * 2, y, hidden)
+    return pos, groups, counts
 
 
 class SokobanDiagram:
     def __init__(self, parent_frame, initial_state, explored, algorithm, max_depth=5):
         self.parent_frame = parent_frame
         self.initial_state = initial_state
-        self.explored = explored
+        self.explored = list(explored)  # traza acotada de la búsqueda
         self.algorithm = algorithm # 🔹 Nuevo parámetro
         self.max_depth = max_depth
         self.current_step = 0
@@ -74,60 +118,141 @@ class SokobanDiagram:
 
         self.fig, self.ax = plt.subplots(figsize=(6,6))
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.parent_frame)
+        # barra de zoom/desplazamiento: al acercarse aparecen las etiquetas
+        NavigationToolbar2Tk(self.canvas, self.parent_frame).update()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
-        self.full_tree = build_state_tree(self.initial_state, self.explored)
-        
-        # 🔹 Lógica para crear las etiquetas dinámicamente
-        self.node_labels = {}
-        for state in self.full_tree.nodes():
-            if self.algorithm == "A*":
-                g = state.cost
-                h = heuristic(state)
-                f = g + h
-                self.node_labels[state] = f"{state.player}\ng:{g}, h:{h}\nf:{f}"
-            else:
-                self.node_labels[state] = f"{state.player}\n"
-        
+        self.tree = StateTree(self.initial_state, self.explored)
+        self.pos, self.groups, self.counts = layout_tree(self.tree, self.max_depth)
+
+        # etiquetas creadas bajo demanda (nodo -> Text)
+        self.labels = {}
+        self.heuristic = None
+        if self.algorithm.startswith(("A*", "IDA*")):
+            self.heuristic = get_heuristic("manhattan" if self.algorithm == "A*" else "matching")
+
+        self.draw_tree()
+
         # 🔹 Vínculo para detener la animación al cerrar la ventana
         self.parent_frame.bind("<Destroy>", self.stop_animation)
 
+    # ---------------------------
+    # Dibujo (una sola vez)
+    # ---------------------------
+    def draw_tree(self):
+        """Crea los artistas del árbol; cada paso solo cambia colores."""
+        ax = self.ax
+        pos = self.pos
+        parent = self.tree.parent
+
+        segments = [(pos[parent[node]], xy) for node, xy in pos.items() if parent[node] in pos]
+        for depth, (x, y, _) in self.groups.items():
+            segments.append(((0, y + 1.5), (x, y)))
+        ax.add_collection(LineCollection(segments, colors="gray", linewidths=0.8, zorder=1))
+
+        # nodos dibujados: un único PathCollection
+        self.slots = {node: i for i, node in enumerate(pos)}
+        size = 800 if len(pos) <= MAX_LABELS else 120
+        xy = list(pos.values())
+        self.colors = [BASE_COLOR] * len(xy)
+        self.nodes = ax.scatter([x for x, _ in xy], [y for _, y in xy], s=size,
+                                c=self.colors, edgecolors="gray", zorder=2)
+
+        # filas recortadas: un nodo "+N" por profundidad
+        self.group_slots = {depth: i for i, depth in enumerate(self.groups)}
+        self.group_colors = [GROUP_COLOR] * len(self.groups)
+        self.group_nodes = None
+        if self.groups:
+            groups = list(self.groups.values())
+            self.group_nodes = ax.scatter([x for x, _, _ in groups], [y for _, y, _ in groups],
+                                          s=size, marker="s", c=self.group_colors,
+                                          edgecolors="gray", zorder=2)
+            for x, y, hidden in groups:
+                ax.annotate(f"+{hidden}", (x, y), textcoords="offset points", xytext=(0, -14),
+                            ha="center", fontsize=8, zorder=3)
+
+        # conteo de estados por profundidad en el eje vertical
+        depths = sorted(self.counts)
+        ax.set_yticks([-depth * 1.5 for depth in depths])
+        ax.set_yticklabels([f"{depth}: {self.counts[depth]}" for depth in depths], fontsize=8)
+        ax.set_xticks([])
+        for side in ("top", "right", "bottom"):
+            ax.spines[side].set_visible(False)
+        outside = sum(1 for depth in self.tree.depth if depth < 0)
+        ax.set_xlabel(f"{len(self.tree)} estados" + (f" ({outside} fuera del árbol)" if outside else ""),
+                      fontsize=8)
+        ax.autoscale_view()
+        ax.margins(0.1)
+
+        ax.callbacks.connect("xlim_changed", self.update_labels)
+        ax.callbacks.connect("ylim_changed", self.update_labels)
+        self.update_labels()
+
+    # ---------------------------
+    # Etiquetas perezosas
+    # ---------------------------
+    def label_text(self, node):
+        state = self.tree.states[node]
+        if self.heuristic is None:
+            return f"{state.player}\n"
+        g = state.cost
+        h = self.heuristic(state)
+        return f"{state.player}\ng:{g}, h:{h}\nf:{g + h}"
+
+    def update_labels(self, ax=None):
+        """Muestra etiquetas solo si hay pocos nodos a la vista."""
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        visible = [node for node, (x, y) in self.pos.items() if x0 <= x <= x1 and y0 <= y <= y1]
+        if len(visible) > MAX_LABELS:
+            visible = []
+        shown = set(visible)
+
+        for node, text in self.labels.items():
+            text.set_visible(node in shown)
+        for node in visible:
+            if node not in self.labels:
+                x, y = self.pos[node]
+                self.labels[node] = self.ax.text(x, y, self.label_text(node), ha="center",
+                                                 va="center", fontsize=8, zorder=3)
+
+    # ---------------------------
+    # Animación
+    # ---------------------------
+    def paint(self, node, color):
+        """Colorea un nodo o, si está agrupado, el "+N" de su fila."""
+        if node in self.slots:
+            self.colors[self.slots[node]] = color
+            return True
+        depth = self.tree.depth[node]
+        if depth in self.group_slots:
+            self.group_colors[self.group_slots[depth]] = color
+            return True
+        return False
+
     def draw_step(self):
         if not self.parent_frame.winfo_exists():
             return
-        
+
         if self.current_step >= len(self.explored):
             return
 
-        step_state = self.explored[self.current_step]
-        
-        limited_tree, self.pos = hierarchical_pos(self.full_tree, root=self.initial_state, max_depth=self.max_depth)
-        
-        self.ax.clear()
-        
-        colors = []
-        for n in limited_tree.nodes():
-            if n == step_state:
-                colors.append("lightgreen")
-            elif step_state.parent and n == step_state.parent:
-                colors.append("orange")
-            else:
-                colors.append("lightblue")
-
-        nx.draw(
-            limited_tree,
-            self.pos,
-            ax=self.ax,
-            with_labels=True,
-            labels=self.node_labels,
-            node_color=colors,
-            node_size=800,
-            font_size=8,
-            arrows=True
-        )
+        # restaurar los colores del paso anterior
+        self.colors[:] = [BASE_COLOR] * len(self.colors)
+        self.group_colors[:] = [GROUP_COLOR] * len(self.group_colors)
+
+        node = self.tree.step_node[self.current_step]
+        parent = self.tree.parent[node]
+        if parent >= 0:
+            self.paint(parent, PARENT_COLOR)
+        self.paint(node, CURRENT_COLOR)
+
+        self.nodes.set_facecolor(self.colors)
+        if self.group_nodes is not None:
+            self.group_nodes.set_facecolor(self.group_colors)
 
         self.ax.set_title(f"Árbol de estados - Paso {self.current_step+1} / {len(self.explored)}")
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
         self.current_step += 1
         self.after_id = self.parent_frame.after(500, self.draw_step)
@@ -136,9 +261,10 @@ class SokobanDiagram:
         if self.after_id:
             self.parent_frame.after_cancel(self.after_id)
             self.after_id = None
+        plt.close(self.fig)
 
 def show_sokoban_diagram(frame, initial_state, explored, algorithm):
-    """Inicializa y muestra el diagrama, limitado a 3 niveles y jerárquico."""
+    """Inicializa y muestra el diagrama, limitado a 5 niveles y jerárquico."""
     diagram = SokobanDiagram(frame, initial_state, explored, algorithm, max_depth=5)
     diagram.draw_step()
-    return diagram
\ No newline at end of file
+    return diagram
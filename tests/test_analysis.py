@@ -0,0 +1,44 @@
+from benchmark import generate_level
+from replay import verify_state
+from search import SearchStats, solve
+from utils import parse_level
+
+
+def _solve_pushes(rows, algorithm, macros):
+    state = parse_level(rows, macros=macros)
+    stats = SearchStats()
+    solution, _ = solve(algorithm, state, mode="pushes", stats=stats)
+    return state, solution, stats
+
+
+def test_goal_macro_keeps_plain_push():
+    # resoluble por construcción: meter la caja por la entrada de la
+    # habitación de metas no debe obligar a llevarla hasta la meta
+    rows = generate_level(9, 7, 2, seed=310, wall_ratio=0.3)
+    for algorithm in ("bfs", "a_star"):
+        state, solution, stats = _solve_pushes(rows, algorithm, macros=True)
+        assert stats.status == "solved"
+        assert verify_state(state, solution)[0]
+
+
+def test_macros_agree_on_solvability():
+    for seed in range(300, 330):
+        rows = generate_level(9, 7, 2, seed=seed, wall_ratio=0.3)
+        _, _, plain = _solve_pushes(rows, "bfs", macros=False)
+        state, solution, stats = _solve_pushes(rows, "bfs", macros=True)
+        assert stats.status == plain.status
+        if solution is not None:
+            assert verify_state(state, solution)[0]
+
+
+def test_packing_orders_are_lazy_and_capped():
+    from analysis import MAX_ROOM_GOALS
+    from utils import load_levels
+
+    analysis = parse_level(load_levels()[78], macros=True).level.macros
+    assert analysis.goal_rooms
+    assert all(room.order is None for room in analysis.goal_rooms)
+    # más metas que MAX_ROOM_GOALS: sin orden y sin búsquedas de caja
+    room = analysis.goal_rooms[0]
+    assert bin(room.goals).count("1") > MAX_ROOM_GOALS
+    assert analysis._ordered(room).order == ()
@@ -0,0 +1,70 @@
+from benchmark import generate_level
+from cache import DEAD, SolutionCache, solve_cached, store_result
+from search import SearchStats
+from utils import load_levels, parse_level
+
+ROWS = generate_level(9, 7, 2, seed=310, wall_ratio=0.3)
+
+
+def test_macro_dead_entries_are_not_trusted(tmp_path):
+    cache = SolutionCache(str(tmp_path / "solutions.db"))
+    state = parse_level(ROWS, macros=True)
+    # entrada de una versión anterior: agotamiento falso con macro-movimientos
+    cache.put_bound(state, "pushes", DEAD)
+    assert not cache.is_dead(state, "pushes")
+    assert not cache.is_dead(state, "steps")
+
+    stats = SearchStats()
+    solution, _, cached = solve_cached(cache, "bfs", state, mode="steps", stats=stats)
+    assert stats.status == "solved" and solution and not cached
+    cache.close()
+
+
+def test_macro_exhausted_is_not_stored(tmp_path):
+    cache = SolutionCache(str(tmp_path / "solutions.db"))
+    state = parse_level(ROWS, macros=True)
+    stats = SearchStats()
+    stats.status = "exhausted"
+    store_result(cache, "-", state, "pushes", None, stats)
+    assert cache.get_bound(state, "pushes") is None
+    cache.close()
+
+
+def test_macro_bounds_are_not_used(tmp_path):
+    cache = SolutionCache(str(tmp_path / "solutions.db"))
+    state = parse_level(load_levels()[5], macros=True)
+    stats = SearchStats()
+    stats.bound = 40
+    stats.status = "timeout"
+    store_result(cache, "-", state, "pushes", None, stats)
+    assert cache.get_bound(state, "pushes") is None
+
+    # una cota de otra versión no llega a stats.bound ni la búsqueda la registra
+    cache.db.execute("INSERT INTO bounds VALUES (?, ?, 0)", (cache.bound_key(state, "pushes"), 500))
+    stats = SearchStats()
+    solve_cached(cache, "a_star", state, mode="pushes", stats=stats, deadline=0)
+    assert stats.status == "timeout" and stats.bound == 0
+    cache.close()
+
+
+def test_plain_dead_entries_are_trusted(tmp_path):
+    cache = SolutionCache(str(tmp_path / "solutions.db"))
+    state = parse_level(ROWS)
+    cache.put_bound(state, "pushes", DEAD)
+    assert cache.is_dead(parse_level(ROWS, macros=True), "steps")
+    cache.close()
+
+
+def test_deadlock_patterns_shared_by_board(tmp_path):
+    cache = SolutionCache(str(tmp_path / "solutions.db"))
+    levels = load_levels()
+    first = parse_level(levels[4])
+    solve_cached(cache, "a_star", first, mode="pushes", stats=SearchStats())
+    learned = first.level.deadlock.known()
+    assert learned and set(cache.get_patterns(first.level)) == learned
+
+    # otra búsqueda sobre el mismo tablero arranca con los patrones cargados
+    second = parse_level(levels[4])
+    solve_cached(cache, "bfs", second, mode="pushes", stats=SearchStats(), deadline=0)
+    assert learned <= second.level.deadlock.known()
+    cache.close()
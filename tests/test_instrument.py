@@ -0,0 +1,26 @@
+import heapq
+
+from deadlock import DeadlockDetector
+from instrument import Profile
+from search import EXPANDERS, a_star, bfs
+from state import State
+from utils import load_levels, parse_level
+
+
+def test_profile_does_not_patch_globals():
+    originals = (State.__hash__, heapq.heappush, heapq.heappop, dict(EXPANDERS))
+
+    def progress(stats, frontier_size, f):
+        # durante la búsqueda perfilada, otros hilos ven las funciones originales
+        assert (State.__hash__, heapq.heappush, heapq.heappop, dict(EXPANDERS)) == originals
+
+    for algorithm, args in ((bfs, ()), (a_star, ("matching",))):
+        profile = Profile()
+        state = parse_level(load_levels()[8])
+        solution, _ = algorithm(state, *args, mode="pushes", profile=profile, progress=progress)
+        assert solution
+        assert profile.calls["expand"]
+        assert "hash" not in profile.calls
+        if args:
+            assert profile.calls["heuristic"]
+        assert isinstance(state.level.deadlock, DeadlockDetector)
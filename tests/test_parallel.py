@@ -0,0 +1,27 @@
+import queue
+
+from benchmark import parse_config
+from parallel import _run_config, portfolio
+from search import SearchStats, solve
+from utils import load_levels, parse_level
+
+
+def test_worker_keeps_level_options():
+    rows = load_levels()[4]
+    config = parse_config("bfs::pushes")
+    for options in ({"deadlocks": True, "macros": True}, {"deadlocks": False, "macros": False}):
+        state = parse_level(rows, **options)
+        stats = SearchStats()
+        solve("bfs", state, mode="pushes", stats=stats)
+
+        results = queue.Queue()
+        _run_config(0, rows, options, state.pos, state.box_bits, config, None, results)
+        _, _, result = results.get_nowait()
+        assert result["expanded"] == stats.expanded
+
+
+def test_portfolio_with_macros():
+    state = parse_level(load_levels()[4], macros=True)
+    stats = SearchStats()
+    solution, winner, _ = portfolio(state, ("bfs::pushes", "a_star:matching:pushes"), stats=stats)
+    assert stats.status == "solved" and solution and winner
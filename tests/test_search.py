@@ -0,0 +1,17 @@
+from search import MatchingHeuristic, get_heuristic
+from utils import load_levels, parse_level
+
+
+def test_matching_heuristic_is_per_search():
+    assert get_heuristic("matching") is not get_heuristic("matching")
+
+
+def test_interleaved_matching_heuristics():
+    # dos búsquedas intercaladas (p. ej. hilo de la GUI y diagrama) no se
+    # pisan el emparejamiento incremental
+    levels = load_levels()
+    first, second = get_heuristic("matching"), get_heuristic("matching")
+    a, b = parse_level(levels[9]), parse_level(levels[15])
+    for child_a, child_b in zip(a.expand_pushes(), b.expand_pushes()):
+        assert first(child_a) == MatchingHeuristic()(child_a)
+        assert second(child_b) == MatchingHeuristic()(child_b)
@@ -0,0 +1,23 @@
+from utils import load_levels, parse_level
+
+
+def _assert_hashes(states):
+    for state in states:
+        assert hash(state) == state.level.zobrist(state.pos, state.box_bits)
+
+
+def test_zobrist_steps():
+    state = parse_level(load_levels()[4])
+    frontier = [state]
+    for _ in range(4):
+        frontier = [child for parent in frontier for child in parent.expand()]
+        _assert_hashes(frontier)
+
+
+def test_zobrist_pushes_with_macros():
+    # con macro-movimientos la caja puede avanzar varias celdas por sucesor
+    for index in (4, 9, 54):
+        frontier = [parse_level(load_levels()[index], macros=True)]
+        for _ in range(3):
+            frontier = [child for parent in frontier for child in parent.expand_pushes()]
+            _assert_hashes(frontier)
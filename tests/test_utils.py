@@ -0,0 +1,18 @@
+import json
+
+import pytest
+
+from utils import load_levels, parse_level
+
+
+def test_bad_json_level_only_fails_on_access(tmp_path):
+    path = tmp_path / "levels.json"
+    good = ["#####", "#@$.#", "#####"]
+    path.write_text(json.dumps([good, ["#####", "#@$ #", "#####"], good]))
+    levels = load_levels(str(path))
+    assert len(levels) == 3
+    assert parse_level(levels[2]).level.width == 5
+    with pytest.raises(ValueError):
+        levels[1]
+    with pytest.raises(IndexError):
+        levels[3]
@@ -0,0 +1,114 @@
+from collections import deque
+
+# Traza por defecto de la GUI: suficiente para animar, acotada en memoria
+DEFAULT_TRACE = "first(10000)"
+
+TRACE_MODES = ("none", "first", "sampled", "ring-buffer")
+
+
+class Trace:
+    """
+    Registro acotado de los estados explorados por una búsqueda.
+
+    Modos:
+    - "none": no guarda nada (búsqueda sin costo extra de memoria)
+    - "first": los primeros `limit` estados
+    - "sampled": como máximo `limit` estados repartidos por toda la búsqueda;
+      al llenarse se descarta uno de cada dos y se duplica el paso
+    - "ring-buffer": los últimos `limit` estados
+
+    Si se pasa `callback`, cada registro conservado se envía al callback en
+    el momento y no se guarda ninguna lista (modo streaming).
+    """
+
+    def __init__(self, mode="first", limit=10000, callback=None):
+        if mode not in ("none", "first", "sampled", "ring-buffer"):
+            raise ValueError(f"Modo de traza desconocido: {mode}")
+        if mode != "none" and limit <= 0:
+            raise ValueError("El límite de la traza debe ser positivo")
+        self.mode = mode
+        self.limit = limit
+        self.callback = callback
+        self.active = mode != "none"
+        self.seen = 0      # estados ofrecidos a la traza
+        self.stride = 1    # paso de muestreo (modo "sampled")
+        self._emitted = 0  # registros enviados con el paso actual (streaming)
+        if mode == "ring-buffer" and callback is None:
+            self._buffer = deque(maxlen=limit)
+        else:
+            self._buffer = []
+
+    def record(self, state):
+        """Ofrece un estado explorado a la traza."""
+        index = self.seen
+        self.seen += 1
+        mode = self.mode
+
+        if mode == "first":
+            if index < self.limit:
+                self._keep(state)
+        elif mode == "ring-buffer":
+            self._keep(state)
+        elif mode == "sampled":
+            if index % self.stride == 0:
+                self._keep(state)
+                self._resample()
+
+    def _keep(self, state):
+        if self.callback is not None:
+            self.callback(state)
+        else:
+            self._buffer.append(state)
+
+    def _resample(self):
+        """Mantiene el modo "sampled" por debajo del límite."""
+        if self.callback is not None:
+            self._emitted += 1
+            if self._emitted >= self.limit:
+                self._emitted = 0
+                self.stride *= 2
+        elif len(self._buffer) >= self.limit:
+            del self._buffer[1::2]
+            self.stride *= 2
+
+    def records(self):
+        """Estados conservados, en orden de exploración."""
+        return list(self._buffer)
+
+    def __iter__(self):
+        return iter(self._buffer)
+
+    def __len__(self):
+        return len(self._buffer)
+
+
+def _parse_spec(spec):
+    """"modo(N)" -> (modo, "N" o None). Sin re para no cargarlo al importar search."""
+    text = spec.strip()
+    mode, limit = text, None
+    if text.endswith(")") and "(" in text:
+        mode, _, limit = text[:-1].partition("(")
+        mode, limit = mode.strip(), limit.strip()
+        if not limit.isdigit():
+            mode = None
+    if mode not in TRACE_MODES:
+        raise ValueError(f"Especificación de traza inválida: {spec!r}")
+    return mode, limit
+
+
+def make_trace(spec=DEFAULT_TRACE, callback=None):
+    """
+    Crea una Trace a partir de una especificación:
+    "none", "first(N)", "sampled(N)" o "ring-buffer(N)".
+    Si spec ya es una Trace se devuelve tal cual.
+    """
+    if isinstance(spec, Trace):
+        return spec
+    if spec is None:
+        spec = "none"
+    mode, limit = _parse_spec(spec)
+    if mode == "none":
+        return Trace("none", callback=callback)
+    if limit is None:
+        raise ValueError(f"La traza {mode!r} necesita un límite, p. ej. {mode}(1000)")
+    return Trace(mode, int(limit), callback=callback)
@@ -1,15 +1,33 @@
 import json
+from analysis import LevelAnalysis
+from deadlock import DeadlockDetector
+from level import Level
+from levelpack import LevelList, LevelPack
 from state import State
 
 def load_levels(filename="levels.json"):
+    """
+    Carga una colección de niveles. Los .json (lista de niveles como listas
+    de strings) se leen enteros en un LevelList; cualquier otro archivo se
+    trata como XSB / .sok y se devuelve un LevelPack, que lee cada nivel bajo
+    demanda. En los dos casos se admite len() e indexado y cada nivel se
+    valida y normaliza al pedirlo (ver levelpack.normalize_level): uno mal
+    formado da ValueError solo al acceder a él.
+    """
+    if not filename.lower().endswith(".json"):
+        return LevelPack(filename)
     with open(filename, "r") as f:
         levels = json.load(f)
-    return levels
+    return LevelList(levels)
 
 
-def parse_level(level):
+def parse_level(level, deadlocks=True, macros=False):
     """
     Convierte un nivel (lista de strings) en un State inicial (saca las posiciones de personaje y entorno).
+    Con deadlocks=True los sucesores descartan también los bloqueos entre
+    cajas (congelamiento y bloques 2x2, ver deadlock.py).
+    Con macros=True el modo empujes usa macro-movimientos por túneles y
+    hacia las habitaciones de metas (ver analysis.py).
     Ejemplo de nivel:
     [
         "#########",
@@ -36,5 +54,10 @@ def parse_level(level):
                 player = (x, y)
                 goals.add((x, y))
     
-    # Crear y retornar el estado inicial
-    return State(player, boxes, goals, level)
+    # Datos estáticos compartidos + estado inicial compacto
+    static = Level(level, goals, player)
+    if deadlocks:
+        static.deadlock = DeadlockDetector(static)
+    if macros:
+        static.macros = LevelAnalysis(static)
+    return State(static, static.index(*player), static.to_bits(boxes))